@@ -14,22 +14,43 @@ Compares LLM performance WITH vs WITHOUT the memory proxy across:
 Each test category seeds facts via setup messages, then queries the LLM
 in a fresh conversation (no chat history) to isolate memory contribution.
 
+Requests are issued concurrently (bounded by OLLAMA_NUM_PARALLEL, default 4).
+For the server to actually serve them in parallel, start Ollama with:
+  OLLAMA_NUM_PARALLEL=8 OLLAMA_MAX_LOADED_MODELS=1 ollama serve
+
 Author: Benchmark for ollama-memory-proxy
 ================================================================================
 """
 
 import json
 import time
+import argparse
+import asyncio
+import hashlib
 import sys
 import os
-import re
 import statistics
-from dataclasses import dataclass, field
+from itertools import compress
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 import httpx
 
+try:
+    import ahocorasick  # pyahocorasick: optional single-pass keyword matcher
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson  # optional: faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+# Decoder for Ollama's NDJSON chunks
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
@@ -39,6 +60,18 @@ DIRECT_URL = "http://127.0.0.1:11434"   # Ollama direct (no memory)
 PROXY_URL = "http://127.0.0.1:11435"    # Memory proxy
 TIMEOUT = 600.0  # seconds per request (first call may cold-load model)
 SETTLING_DELAY = 2.0  # seconds to wait after seeding for background storage
+PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))  # concurrent requests per endpoint
+SEED_PARALLEL = 8  # concurrent seed messages in Phase 1
+SEED_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".bench_seed_cache.json"
+)
+RESULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".bench_cache"
+)
+
+# Seeds already sent during this process (and previous runs), keyed by
+# sha1(url|model|message) so the same fact is never embedded+stored twice.
+_SEEDED: set = set()
 
 
 @dataclass
@@ -69,54 +102,194 @@ class BenchmarkRun:
 # LLM Client
 # ---------------------------------------------------------------------------
 
-def chat(base_url: str, messages: List[Dict], model: str = MODEL) -> Tuple[str, float]:
-    """Send a chat request, return (response_text, latency_ms)."""
-    client = httpx.Client(base_url=base_url, timeout=TIMEOUT)
-    t0 = time.perf_counter()
-    r = client.post("/api/chat", json={
+# One keep-alive client per base URL, shared by every call in the run.
+# Created lazily inside the running event loop; closed by close_clients().
+_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+
+
+def _get_client(base_url: str) -> httpx.AsyncClient:
+    client = _CLIENTS.get(base_url)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+        )
+        _CLIENTS[base_url] = client
+    return client
+
+
+async def close_clients():
+    for client in _CLIENTS.values():
+        await client.aclose()
+    _CLIENTS.clear()
+
+
+def strip_think(text: str) -> str:
+    """Strip the leading <think>...</think> block emitted by qwen3 models."""
+    if "<think>" in text:
+        pre, _, rest = text.partition("<think>")
+        _, _, post = rest.partition("</think>")
+        return (pre + post).strip()
+    return text.strip()
+
+
+class _KeywordWatch:
+    """Tracks which keywords have appeared in a streamed answer.
+
+    Chunks are scanned as they arrive, with only a short overlap carried
+    over, so the cost is linear in the reply length. Text inside the
+    <think> block doesn't count, as in strip_think.
+    """
+
+    def __init__(self, keywords: Tuple[str, ...]):
+        self._pending = set(keywords)
+        # Carried-over text: a keyword's worth (less one char) plus a tag, so
+        # keywords and tags split across chunks, or around the think block, match
+        self._keep = max(map(len, keywords)) - 1 + len("</think>")
+        self._buf = ""
+        self._before_think = ""
+        self._state = "answer"  # -> "think" on <think> -> "done" on </think>
+
+    def feed(self, chunk: str) -> bool:
+        """Scan the next chunk; True once every keyword has been seen."""
+        buf = self._buf + chunk.lower()
+        while True:
+            if self._state == "think":
+                end = buf.find("</think>")
+                if end < 0:
+                    break
+                # The answer continues where the text before <think> stopped
+                buf = self._before_think + buf[end + len("</think>"):]
+                self._state = "done"
+                continue
+            start = buf.find("<think>") if self._state == "answer" else -1
+            visible = buf if start < 0 else buf[:start]
+            self._pending = {kw for kw in self._pending if kw not in visible}
+            if start < 0:
+                break
+            self._before_think = visible[-self._keep:]
+            buf = buf[start + len("<think>"):]
+            self._state = "think"
+        self._buf = buf[-self._keep:]
+        return not self._pending and self._state != "think"
+
+
+async def chat(
+    client: httpx.AsyncClient,
+    messages: List[Dict],
+    model: str = MODEL,
+    expected_lower: Optional[Tuple[str, ...]] = None,
+) -> Tuple[str, float]:
+    """Send a streaming chat request, return (response_text, latency_ms).
+
+    If `expected_lower` is given, the stream is closed (aborting generation)
+    as soon as every keyword has appeared in the visible answer, since the
+    rest of the reply cannot change the score.
+    """
+    parts = []
+    watch = _KeywordWatch(expected_lower) if expected_lower else None
+    t0 = time.monotonic_ns()
+    async with client.stream("POST", "/api/chat", json={
         "model": model,
         "messages": messages,
-        "stream": False,
+        "stream": True,
         "options": {"temperature": 0.1, "num_predict": 300},
-    })
-    latency = (time.perf_counter() - t0) * 1000
-    r.raise_for_status()
-    data = r.json()
-    text = data.get("message", {}).get("content", "")
-    # Strip <think>...</think> blocks from qwen3 models
-    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
-    client.close()
-    return text, latency
-
-
-def seed_fact(base_url: str, message: str, model: str = MODEL) -> float:
-    """Send a fact-establishing message, return latency_ms."""
-    _, latency = chat(base_url, [
+    }) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if not line.strip():
+                continue
+            chunk = _json_loads(line)
+            content = chunk.get("message", {}).get("content", "")
+            if not content:
+                continue
+            parts.append(content)
+            if watch is not None and watch.feed(content):
+                break
+    latency = (time.monotonic_ns() - t0) / 1_000_000
+    return strip_think("".join(parts)), latency
+
+
+def _seed_key(base_url: str, message: str, model: str) -> str:
+    return hashlib.sha1(f"{base_url}|{model}|{message}".encode("utf-8")).hexdigest()
+
+
+def load_seed_cache():
+    """Load seed keys sent by previous runs into _SEEDED."""
+    try:
+        with open(SEED_CACHE_PATH, "r", encoding="utf-8") as f:
+            _SEEDED.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+
+def save_seed_cache():
+    with open(SEED_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(sorted(_SEEDED), f)
+
+
+async def seed_fact(client: httpx.AsyncClient, message: str, model: str = MODEL) -> Optional[float]:
+    """Send a fact-establishing message, return latency_ms (None if already seeded)."""
+    key = _seed_key(str(client.base_url), message, model)
+    if key in _SEEDED:
+        return None
+    _, latency = await chat(client, [
         {"role": "user", "content": message}
     ], model)
+    _SEEDED.add(key)
     return latency
 
 
-def query_fresh(base_url: str, question: str, model: str = MODEL) -> Tuple[str, float]:
+async def query_fresh(
+    client: httpx.AsyncClient,
+    question: str,
+    model: str = MODEL,
+    expected_lower: Optional[Tuple[str, ...]] = None,
+) -> Tuple[str, float]:
     """Ask a question in a brand-new conversation (no history), return (response, latency_ms)."""
-    return chat(base_url, [
+    return await chat(client, [
         {"role": "user", "content": question}
-    ], model)
+    ], model, expected_lower)
 
 
 # ---------------------------------------------------------------------------
 # Keyword-based scoring
 # ---------------------------------------------------------------------------
 
-def score_response(response: str, expected_keywords: List[str]) -> Tuple[List[str], List[str], float]:
-    """Check which expected keywords appear in the response (case-insensitive)."""
+def score_response(
+    response: str,
+    expected_keywords: List[str],
+    expected_lower: Tuple[str, ...],
+    automaton=None,
+) -> Tuple[List[str], List[str], float]:
+    """Check which expected keywords appear in the response (case-insensitive).
+
+    `expected_lower` is the pre-lowered form of `expected_keywords`. When an
+    Aho-Corasick `automaton` over those keywords is given, all of them are
+    matched in one scan of the response instead of one scan per keyword.
+    """
     lower = response.lower()
-    found = [kw for kw in expected_keywords if kw.lower() in lower]
-    missing = [kw for kw in expected_keywords if kw.lower() not in lower]
+    if automaton is not None:
+        hits = {i for _, i in automaton.iter(lower)}
+        found_mask = [i in hits for i in range(len(expected_lower))]
+    else:
+        found_mask = [kw in lower for kw in expected_lower]
+    found = list(compress(expected_keywords, found_mask))
+    missing = list(compress(expected_keywords, [not hit for hit in found_mask]))
     score = len(found) / len(expected_keywords) if expected_keywords else 0.0
     return found, missing, score
 
 
+def build_automaton(keywords_lower: Tuple[str, ...]):
+    """Build an Aho-Corasick automaton mapping each keyword to its index."""
+    automaton = ahocorasick.Automaton()
+    for i, kw in enumerate(keywords_lower):
+        automaton.add_word(kw, i)
+    automaton.make_automaton()
+    return automaton
+
+
 def pass_fail(score: float) -> str:
     if score >= 0.8:
         return "PASS"
@@ -130,223 +303,383 @@ def pass_fail(score: float) -> str:
 # Test Definitions
 # ---------------------------------------------------------------------------
 
-# Each test: (category, seed_messages, query, expected_keywords, test_id)
+@dataclass(frozen=True, slots=True)
+class TestSpec:
+    """One benchmark test: facts to seed, the query, and expected keywords."""
+    category: str
+    seeds: Tuple[str, ...]
+    query: str
+    expected: Tuple[str, ...]
+    id: str
+    # Derived at construction so scoring never re-lowers keywords
+    expected_lower: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    automaton: Any = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        expected_lower = tuple(k.lower() for k in self.expected)
+        object.__setattr__(self, "expected_lower", expected_lower)
+        object.__setattr__(
+            self,
+            "automaton",
+            build_automaton(expected_lower) if ahocorasick is not None else None,
+        )
+
 
-TESTS = [
+TESTS: Tuple[TestSpec, ...] = (
     # ===== CATEGORY 1: Personal Fact Recall =====
-    {
-        "category": "1. Personal Fact Recall",
-        "seeds": [
+    TestSpec(
+        category="1. Personal Fact Recall",
+        seeds=(
             "My name is Lucian Borbeleac and I am 35 years old.",
-        ],
-        "query": "What is my name and how old am I?",
-        "expected": ["Lucian", "35"],
-        "id": "PF-01-name-age",
-    },
-    {
-        "category": "1. Personal Fact Recall",
-        "seeds": [
+        ),
+        query="What is my name and how old am I?",
+        expected=("Lucian", "35"),
+        id="PF-01-name-age",
+    ),
+    TestSpec(
+        category="1. Personal Fact Recall",
+        seeds=(
             "I live in Timisoara, Romania and I work as an AI researcher.",
-        ],
-        "query": "Where do I live and what is my profession?",
-        "expected": ["Timisoara", "Romania", "AI"],
-        "id": "PF-02-location-job",
-    },
-    {
-        "category": "1. Personal Fact Recall",
-        "seeds": [
+        ),
+        query="Where do I live and what is my profession?",
+        expected=("Timisoara", "Romania", "AI"),
+        id="PF-02-location-job",
+    ),
+    TestSpec(
+        category="1. Personal Fact Recall",
+        seeds=(
             "My favorite programming language is Python and I use Neovim as my editor.",
-        ],
-        "query": "What programming language do I prefer and what editor do I use?",
-        "expected": ["Python", "Neovim"],
-        "id": "PF-03-preferences",
-    },
-    {
-        "category": "1. Personal Fact Recall",
-        "seeds": [
+        ),
+        query="What programming language do I prefer and what editor do I use?",
+        expected=("Python", "Neovim"),
+        id="PF-03-preferences",
+    ),
+    TestSpec(
+        category="1. Personal Fact Recall",
+        seeds=(
             "I have a black cat named Shadow and a golden retriever named Rex.",
-        ],
-        "query": "What pets do I have? What are their names?",
-        "expected": ["Shadow", "Rex", "cat", "retriever"],
-        "id": "PF-04-pets",
-    },
-    {
-        "category": "1. Personal Fact Recall",
-        "seeds": [
+        ),
+        query="What pets do I have? What are their names?",
+        expected=("Shadow", "Rex", "cat", "retriever"),
+        id="PF-04-pets",
+    ),
+    TestSpec(
+        category="1. Personal Fact Recall",
+        seeds=(
             "My phone number is 0722-555-123 and my email is lucian@example.com.",
-        ],
-        "query": "What is my phone number and email address?",
-        "expected": ["0722", "555", "123", "lucian@example.com"],
-        "id": "PF-05-contact",
-    },
+        ),
+        query="What is my phone number and email address?",
+        expected=("0722", "555", "123", "lucian@example.com"),
+        id="PF-05-contact",
+    ),
 
     # ===== CATEGORY 2: Multi-Turn Conversation Continuity =====
-    {
-        "category": "2. Multi-Turn Continuity",
-        "seeds": [
+    TestSpec(
+        category="2. Multi-Turn Continuity",
+        seeds=(
             "I am building a drone that can deliver packages autonomously.",
             "The drone uses a Raspberry Pi 5 as its flight controller.",
             "I plan to add computer vision using a stereo camera setup.",
-        ],
-        "query": "What project am I working on and what hardware does it use?",
-        "expected": ["drone", "Raspberry Pi", "camera"],
-        "id": "MT-01-project-hw",
-    },
-    {
-        "category": "2. Multi-Turn Continuity",
-        "seeds": [
+        ),
+        query="What project am I working on and what hardware does it use?",
+        expected=("drone", "Raspberry Pi", "camera"),
+        id="MT-01-project-hw",
+    ),
+    TestSpec(
+        category="2. Multi-Turn Continuity",
+        seeds=(
             "Yesterday I went to the dentist for a root canal procedure.",
             "The dentist said I need to come back next week for a crown fitting.",
             "The total cost will be around 500 euros.",
-        ],
-        "query": "What medical appointment did I have recently and what follow-up is needed?",
-        "expected": ["dentist", "root canal", "crown", "500"],
-        "id": "MT-02-medical",
-    },
-    {
-        "category": "2. Multi-Turn Continuity",
-        "seeds": [
+        ),
+        query="What medical appointment did I have recently and what follow-up is needed?",
+        expected=("dentist", "root canal", "crown", "500"),
+        id="MT-02-medical",
+    ),
+    TestSpec(
+        category="2. Multi-Turn Continuity",
+        seeds=(
             "I am reading the book 'Godel Escher Bach' by Douglas Hofstadter.",
             "I am on chapter 12 and I find the recursion concepts fascinating.",
             "After this I plan to read 'The Master Algorithm' by Pedro Domingos.",
-        ],
-        "query": "What book am I currently reading and what will I read next?",
-        "expected": ["Godel", "Hofstadter", "Master Algorithm", "Domingos"],
-        "id": "MT-03-books",
-    },
+        ),
+        query="What book am I currently reading and what will I read next?",
+        expected=("Godel", "Hofstadter", "Master Algorithm", "Domingos"),
+        id="MT-03-books",
+    ),
 
     # ===== CATEGORY 3: Temporal Context (evolving info) =====
-    {
-        "category": "3. Temporal Context",
-        "seeds": [
+    TestSpec(
+        category="3. Temporal Context",
+        seeds=(
             "I just bought a new laptop - a ThinkPad X1 Carbon Gen 12 with 32GB RAM.",
             "I installed Ubuntu 24.04 on it and it runs perfectly.",
             "Update: I upgraded the RAM to 64GB because I need it for ML training.",
-        ],
-        "query": "What laptop do I have and how much RAM does it have now?",
-        "expected": ["ThinkPad", "64"],
-        "id": "TC-01-laptop-update",
-    },
-    {
-        "category": "3. Temporal Context",
-        "seeds": [
+        ),
+        query="What laptop do I have and how much RAM does it have now?",
+        expected=("ThinkPad", "64"),
+        id="TC-01-laptop-update",
+    ),
+    TestSpec(
+        category="3. Temporal Context",
+        seeds=(
             "I moved to a new apartment on Strada Victoriei, 3rd floor.",
             "The rent is 450 euros per month, utilities included.",
             "Update: the landlord raised the rent to 500 euros starting next month.",
-        ],
-        "query": "Where is my apartment and how much is my rent?",
-        "expected": ["Victoriei", "500"],
-        "id": "TC-02-rent-update",
-    },
+        ),
+        query="Where is my apartment and how much is my rent?",
+        expected=("Victoriei", "500"),
+        id="TC-02-rent-update",
+    ),
 
     # ===== CATEGORY 4: Cross-Topic Association =====
-    {
-        "category": "4. Cross-Topic Association",
-        "seeds": [
+    TestSpec(
+        category="4. Cross-Topic Association",
+        seeds=(
             "My sister's name is Elena and she lives in Cluj-Napoca.",
             "Elena works as a doctor at the county hospital.",
             "I need to visit Elena next month because she is getting married on March 15th.",
-        ],
-        "query": "What does my sister do for work, where does she live, and when is she getting married?",
-        "expected": ["Elena", "doctor", "Cluj", "March", "15"],
-        "id": "CT-01-sister",
-    },
-    {
-        "category": "4. Cross-Topic Association",
-        "seeds": [
+        ),
+        query="What does my sister do for work, where does she live, and when is she getting married?",
+        expected=("Elena", "doctor", "Cluj", "March", "15"),
+        id="CT-01-sister",
+    ),
+    TestSpec(
+        category="4. Cross-Topic Association",
+        seeds=(
             "My car is a 2022 Dacia Duster with 45000 km on it.",
             "The car needs new brake pads - the mechanic quoted 200 euros.",
             "I also need to renew my insurance before April 1st, the premium is 800 euros per year.",
-        ],
-        "query": "Tell me about my car - what model is it, what repairs does it need, and when is the insurance due?",
-        "expected": ["Dacia", "Duster", "brake", "200", "April", "insurance"],
-        "id": "CT-02-car",
-    },
+        ),
+        query="Tell me about my car - what model is it, what repairs does it need, and when is the insurance due?",
+        expected=("Dacia", "Duster", "brake", "200", "April", "insurance"),
+        id="CT-02-car",
+    ),
 
     # ===== CATEGORY 5: Precision & Detail Recall =====
-    {
-        "category": "5. Precision Recall",
-        "seeds": [
+    TestSpec(
+        category="5. Precision Recall",
+        seeds=(
             "The WiFi password for my home network is Tr0ub4dor&3. The network name is BorbeNet5G.",
-        ],
-        "query": "What is my WiFi network name and password?",
-        "expected": ["BorbeNet5G", "Tr0ub4dor"],
-        "id": "PR-01-wifi",
-    },
-    {
-        "category": "5. Precision Recall",
-        "seeds": [
+        ),
+        query="What is my WiFi network name and password?",
+        expected=("BorbeNet5G", "Tr0ub4dor"),
+        id="PR-01-wifi",
+    ),
+    TestSpec(
+        category="5. Precision Recall",
+        seeds=(
             "My server's IP address is 192.168.1.42 and it runs on port 8080.",
             "The admin username is 'lucian_admin' and the database is PostgreSQL 16.",
-        ],
-        "query": "What is my server IP, port, admin username, and database engine?",
-        "expected": ["192.168.1.42", "8080", "lucian_admin", "PostgreSQL"],
-        "id": "PR-02-server",
-    },
-]
+        ),
+        query="What is my server IP, port, admin username, and database engine?",
+        expected=("192.168.1.42", "8080", "lucian_admin", "PostgreSQL"),
+        id="PR-02-server",
+    ),
+)
 
 
 # ---------------------------------------------------------------------------
 # Benchmark Runner
 # ---------------------------------------------------------------------------
 
-def run_benchmark(mode: str, base_url: str, model: str = MODEL) -> BenchmarkRun:
-    """Run all tests against a given endpoint."""
+def build_result(test: TestSpec, response: str, query_lat: float) -> TestResult:
+    """Score a query response against a test definition."""
+    found, missing, sc = score_response(
+        response, test.expected, test.expected_lower, test.automaton
+    )
+    return TestResult(
+        test_id=test.id,
+        category=test.category,
+        query=test.query,
+        expected_keywords=list(test.expected),
+        response=response[:500],
+        keywords_found=found,
+        keywords_missing=missing,
+        score=sc,
+        latency_ms=query_lat,
+        pass_fail=pass_fail(sc),
+    )
+
+
+def error_result(test: TestSpec, exc: BaseException) -> TestResult:
+    """Record a test whose request failed as a FAIL with the error as response."""
+    return TestResult(
+        test_id=test.id,
+        category=test.category,
+        query=test.query,
+        expected_keywords=list(test.expected),
+        response=f"ERROR: {exc}",
+        keywords_found=[],
+        keywords_missing=list(test.expected),
+        score=0.0,
+        latency_ms=0.0,
+        pass_fail="FAIL",
+    )
+
+
+async def _gather_tests(run_one, tag: str = "") -> List[TestResult]:
+    """Run `run_one(test)` for every test concurrently, preserving TESTS order.
+
+    `tag` prefixes progress lines so interleaved phases stay readable.
+    """
+    sem = asyncio.Semaphore(PARALLEL)
+
+    async def bounded(test: TestSpec) -> TestResult:
+        async with sem:
+            result = await run_one(test)
+        print(f"  {tag}{result.test_id} ... {result.pass_fail} "
+              f"(score={result.score:.0%}, {result.latency_ms:.0f}ms)")
+        return result
+
+    outcomes = await asyncio.gather(
+        *[bounded(test) for test in TESTS], return_exceptions=True
+    )
+    results = []
+    for test, outcome in zip(TESTS, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"  {tag}{test.id} ... ERROR ({outcome})")
+            outcome = error_result(test, outcome)
+        results.append(outcome)
+    return results
+
+
+def _result_cache_path(mode: str, model: str) -> str:
+    safe_model = model.replace(":", "_").replace("/", "_")
+    return os.path.join(RESULT_CACHE_DIR, f"{mode}_{safe_model}.jsonl")
+
+
+def load_cached_results(path: str) -> Dict[str, TestResult]:
+    """Load results persisted by an earlier (possibly interrupted) run.
+
+    Lines that don't parse (torn by an interrupt, or written by an older
+    TestResult) are skipped; those tests simply run again.
+    """
+    cached = {}
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    result = TestResult(**_json_loads(line))
+                except (ValueError, TypeError):
+                    continue
+                cached[result.test_id] = result
+    except OSError:
+        pass
+    return cached
+
+
+def append_cached_result(path: str, result: TestResult):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+
+
+async def run_benchmark(
+    mode: str,
+    base_url: str,
+    model: str = MODEL,
+    force: bool = False,
+) -> BenchmarkRun:
+    """Query every test in a fresh conversation against a given endpoint.
+
+    Facts are seeded once up front (Phase 1 / seed_all), not per test.
+    Each completed result is appended to a JSONL file under RESULT_CACHE_DIR,
+    so an interrupted run resumes where it stopped; `force` discards it.
+    The file is deleted once every test has a result, so the next run
+    queries the endpoint again.
+    """
     run = BenchmarkRun(mode=mode, url=base_url, model=model)
-    t_start = time.perf_counter()
-
-    total = len(TESTS)
-    for i, test in enumerate(TESTS, 1):
-        tid = test["id"]
-        category = test["category"]
-        print(f"  [{i}/{total}] {tid} ...", end=" ", flush=True)
-
-        # Seed facts
-        for seed_msg in test["seeds"]:
-            lat = seed_fact(base_url, seed_msg, model)
-            run.seed_latencies_ms.append(lat)
-
-        # Wait for background storage (proxy stores async)
-        if mode == "proxy":
-            time.sleep(SETTLING_DELAY)
-
-        # Query in fresh conversation
-        response, query_lat = query_fresh(base_url, test["query"], model)
-        found, missing, sc = score_response(response, test["expected"])
-        pf = pass_fail(sc)
-
-        result = TestResult(
-            test_id=tid,
-            category=category,
-            query=test["query"],
-            expected_keywords=test["expected"],
-            response=response[:500],
-            keywords_found=found,
-            keywords_missing=missing,
-            score=sc,
-            latency_ms=query_lat,
-            pass_fail=pf,
+    t_start = time.monotonic_ns()
+    client = _get_client(base_url)
+
+    cache_path = _result_cache_path(mode, model)
+    if force and os.path.exists(cache_path):
+        os.remove(cache_path)
+    cached = load_cached_results(cache_path)
+    if cached:
+        print(f"  [{mode[0].upper()}] Reusing {len(cached)} cached results "
+              f"from {cache_path} (--force to re-run)")
+
+    async def run_one(test: TestSpec) -> TestResult:
+        if test.id in cached:
+            return cached[test.id]
+        response, query_lat = await query_fresh(
+            client, test.query, model, test.expected_lower
         )
-        run.results.append(result)
-        print(f"{pf} (score={sc:.0%}, {query_lat:.0f}ms)")
+        result = build_result(test, response, query_lat)
+        append_cached_result(cache_path, result)
+        cached[test.id] = result
+        return result
+
+    run.results = await _gather_tests(run_one, tag=f"[{mode[0].upper()}] ")
+    # Failed requests aren't cached; keep the file so a re-run retries only those
+    if len(cached) == len(TESTS) and os.path.exists(cache_path):
+        os.remove(cache_path)
 
-    run.total_time_s = time.perf_counter() - t_start
+    run.total_time_s = (time.monotonic_ns() - t_start) / 1_000_000_000
     return run
 
 
+async def seed_all(base_url: str, seeds: List[str], model: str = MODEL) -> List[float]:
+    """Send all seed messages concurrently through one shared client, return latencies_ms.
+
+    Seeds are independent writes, so they are overlapped (capped by
+    SEED_PARALLEL); progress is reported in completion order. Seeds sent
+    by an earlier run (see SEED_CACHE_PATH) are skipped.
+    """
+    sem = asyncio.Semaphore(SEED_PARALLEL)
+    latencies = []
+    client = _get_client(base_url)
+
+    async def seed_one(seed: str) -> Tuple[str, float]:
+        async with sem:
+            return seed, await seed_fact(client, seed, model)
+
+    pending = [seed_one(seed) for seed in seeds]
+    for i, next_done in enumerate(asyncio.as_completed(pending), 1):
+        seed, lat = await next_done
+        if lat is None:
+            print(f"    [{i}/{len(seeds)}] {seed[:60]}... (already seeded)")
+            continue
+        latencies.append(lat)
+        print(f"    [{i}/{len(seeds)}] {seed[:60]}... ({lat:.0f}ms)")
+    return latencies
+
+
 # ---------------------------------------------------------------------------
 # Latency Benchmark (pure overhead measurement)
 # ---------------------------------------------------------------------------
 
-def run_latency_benchmark(base_url: str, mode: str, n_rounds: int = 5) -> Dict[str, Any]:
-    """Measure pure latency overhead with simple queries."""
-    print(f"\n  Latency benchmark ({n_rounds} rounds)...")
-    latencies = []
-    for i in range(n_rounds):
+async def run_latency_benchmark(
+    base_url: str,
+    mode: str,
+    n_rounds: int = 5,
+    concurrency: int = 1,
+) -> Dict[str, Any]:
+    """Measure pure latency overhead with simple queries.
+
+    One warm-up query is sent first and discarded so model load time does
+    not skew the stats. Rounds then run `concurrency` at a time
+    (1 = strictly serial latency).
+    """
+    print(f"\n  Latency benchmark ({n_rounds} rounds, concurrency={concurrency})...")
+    client = _get_client(base_url)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one_round(i: int) -> float:
         msg = f"Say only the word 'hello'. Nothing else. Round {i+1}."
-        _, lat = query_fresh(base_url, msg)
-        latencies.append(lat)
-        print(f"    Round {i+1}: {lat:.0f}ms")
+        async with sem:
+            _, lat = await query_fresh(client, msg)
+        if i >= 0:
+            print(f"    Round {i+1}: {lat:.0f}ms")
+        return lat
+
+    warmup = await one_round(-1)
+    print(f"    Warm-up (discarded): {warmup:.0f}ms")
+    latencies = list(await asyncio.gather(*[one_round(i) for i in range(n_rounds)]))
 
     return {
         "mode": mode,
@@ -364,6 +697,29 @@ def run_latency_benchmark(base_url: str, mode: str, n_rounds: int = 5) -> Dict[s
 # Report Generation
 # ---------------------------------------------------------------------------
 
+def _aggregate(results: List[TestResult]) -> Dict[str, Any]:
+    """Summarize results in a single pass: overall mean, PASS/FAIL counts,
+    and per-category [score_sum, count] accumulators."""
+    total = 0.0
+    passed = failed = 0
+    categories = defaultdict(lambda: [0.0, 0])
+    for r in results:
+        total += r.score
+        if r.pass_fail == "PASS":
+            passed += 1
+        elif r.pass_fail == "FAIL":
+            failed += 1
+        acc = categories[r.category]
+        acc[0] += r.score
+        acc[1] += 1
+    return {
+        "avg_score": total / len(results) if results else 0.0,
+        "passed": passed,
+        "failed": failed,
+        "categories": categories,
+    }
+
+
 def generate_report(
     direct: BenchmarkRun,
     proxy: BenchmarkRun,
@@ -372,116 +728,130 @@ def generate_report(
     output_path: str,
 ):
     """Generate a markdown benchmark report."""
-    lines = []
-    L = lines.append
-
-    L("# Ollama Memory Proxy - Benchmark Report")
-    L(f"")
-    L(f"**Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}")
-    L(f"**Model:** {MODEL}")
-    L(f"**Direct Ollama:** {DIRECT_URL}")
-    L(f"**Memory Proxy:** {PROXY_URL}")
-    L(f"**Total tests:** {len(TESTS)}")
-    L("")
+    n = len(TESTS)
+    d_stats = _aggregate(direct.results)
+    p_stats = _aggregate(proxy.results)
+    d_pass, d_fail = d_stats["passed"], d_stats["failed"]
+    p_pass, p_fail = p_stats["passed"], p_stats["failed"]
+
+    d_avg = d_stats["avg_score"] * 100
+    p_avg = p_stats["avg_score"] * 100
+    improvement = p_avg - d_avg
+    d_mean, p_mean = lat_direct["mean_ms"], lat_proxy["mean_ms"]
+
+    header = f"""# Ollama Memory Proxy - Benchmark Report
+
+**Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}
+**Model:** {MODEL}
+**Direct Ollama:** {DIRECT_URL}
+**Memory Proxy:** {PROXY_URL}
+**Total tests:** {n}
+
+"""
 
     # ---- Executive Summary ----
-    d_scores = [r.score for r in direct.results]
-    p_scores = [r.score for r in proxy.results]
-    d_pass = sum(1 for r in direct.results if r.pass_fail == "PASS")
-    p_pass = sum(1 for r in proxy.results if r.pass_fail == "PASS")
-    d_fail = sum(1 for r in direct.results if r.pass_fail == "FAIL")
-    p_fail = sum(1 for r in proxy.results if r.pass_fail == "FAIL")
-
-    d_avg = statistics.mean(d_scores) * 100
-    p_avg = statistics.mean(p_scores) * 100
-    improvement = p_avg - d_avg
+    summary = f"""## Executive Summary
 
-    L("## Executive Summary")
-    L("")
-    L("| Metric | Direct (no memory) | Memory Proxy | Delta |")
-    L("|--------|-------------------|-------------|-------|")
-    L(f"| **Average Score** | {d_avg:.1f}% | {p_avg:.1f}% | **+{improvement:.1f}%** |")
-    L(f"| Tests PASSED | {d_pass}/{len(TESTS)} | {p_pass}/{len(TESTS)} | +{p_pass - d_pass} |")
-    L(f"| Tests FAILED | {d_fail}/{len(TESTS)} | {p_fail}/{len(TESTS)} | {p_fail - d_fail:+d} |")
-    L(f"| Mean Query Latency | {lat_direct['mean_ms']:.0f}ms | {lat_proxy['mean_ms']:.0f}ms | +{lat_proxy['mean_ms'] - lat_direct['mean_ms']:.0f}ms |")
-    L(f"| Total Runtime | {direct.total_time_s:.1f}s | {proxy.total_time_s:.1f}s | |")
-    L("")
+| Metric | Direct (no memory) | Memory Proxy | Delta |
+|--------|-------------------|-------------|-------|
+| **Average Score** | {d_avg:.1f}% | {p_avg:.1f}% | **+{improvement:.1f}%** |
+| Tests PASSED | {d_pass}/{n} | {p_pass}/{n} | +{p_pass - d_pass} |
+| Tests FAILED | {d_fail}/{n} | {p_fail}/{n} | {p_fail - d_fail:+d} |
+| Mean Query Latency | {d_mean:.0f}ms | {p_mean:.0f}ms | +{p_mean - d_mean:.0f}ms |
+| Total Runtime | {direct.total_time_s:.1f}s | {proxy.total_time_s:.1f}s | |
+
+"""
 
     # ---- Per-Category Breakdown ----
-    L("## Per-Category Breakdown")
-    L("")
-    categories = sorted(set(t["category"] for t in TESTS))
-    L("| Category | Direct Avg | Proxy Avg | Improvement |")
-    L("|----------|-----------|----------|-------------|")
-    for cat in categories:
-        d_cat = [r.score for r in direct.results if r.category == cat]
-        p_cat = [r.score for r in proxy.results if r.category == cat]
-        d_a = statistics.mean(d_cat) * 100 if d_cat else 0
-        p_a = statistics.mean(p_cat) * 100 if p_cat else 0
-        L(f"| {cat} | {d_a:.0f}% | {p_a:.0f}% | **+{p_a - d_a:.0f}%** |")
-    L("")
+    d_acc, p_acc = d_stats["categories"], p_stats["categories"]
+    category_rows = []
+    for cat in sorted(d_acc.keys() | p_acc.keys()):
+        d_sum, d_n = d_acc.get(cat, (0.0, 0))
+        p_sum, p_n = p_acc.get(cat, (0.0, 0))
+        d_a = d_sum / d_n * 100 if d_n else 0
+        p_a = p_sum / p_n * 100 if p_n else 0
+        category_rows.append(f"| {cat} | {d_a:.0f}% | {p_a:.0f}% | **+{p_a - d_a:.0f}%** |\n")
+    category_table = (
+        "## Per-Category Breakdown\n\n"
+        "| Category | Direct Avg | Proxy Avg | Improvement |\n"
+        "|----------|-----------|----------|-------------|\n"
+        + "".join(category_rows)
+        + "\n"
+    )
 
     # ---- Detailed Test Results ----
-    L("## Detailed Test Results")
-    L("")
-    L("| Test ID | Category | Direct | Proxy | Keywords Found (Proxy) |")
-    L("|---------|----------|--------|-------|----------------------|")
-    for dr, pr in zip(direct.results, proxy.results):
-        d_icon = {"PASS": "PASS", "PARTIAL": "PART", "FAIL": "FAIL"}[dr.pass_fail]
-        p_icon = {"PASS": "PASS", "PARTIAL": "PART", "FAIL": "FAIL"}[pr.pass_fail]
-        kw = ", ".join(pr.keywords_found) if pr.keywords_found else "-"
-        L(f"| {dr.test_id} | {dr.category.split('.')[0]}. | {d_icon} ({dr.score:.0%}) | {p_icon} ({pr.score:.0%}) | {kw} |")
-    L("")
+    icons = {"PASS": "PASS", "PARTIAL": "PART", "FAIL": "FAIL"}
+    detail_table = (
+        "## Detailed Test Results\n\n"
+        "| Test ID | Category | Direct | Proxy | Keywords Found (Proxy) |\n"
+        "|---------|----------|--------|-------|----------------------|\n"
+        + "".join(
+            f"| {dr.test_id} | {dr.category.split('.')[0]}. "
+            f"| {icons[dr.pass_fail]} ({dr.score:.0%}) "
+            f"| {icons[pr.pass_fail]} ({pr.score:.0%}) "
+            f"| {', '.join(pr.keywords_found) or '-'} |\n"
+            for dr, pr in zip(direct.results, proxy.results)
+        )
+        + "\n"
+    )
 
     # ---- Latency Analysis ----
-    L("## Latency Analysis")
-    L("")
-    L("| Metric | Direct | Proxy | Overhead |")
-    L("|--------|--------|-------|----------|")
-    L(f"| Mean | {lat_direct['mean_ms']:.0f}ms | {lat_proxy['mean_ms']:.0f}ms | +{lat_proxy['mean_ms'] - lat_direct['mean_ms']:.0f}ms |")
-    L(f"| Median | {lat_direct['median_ms']:.0f}ms | {lat_proxy['median_ms']:.0f}ms | +{lat_proxy['median_ms'] - lat_direct['median_ms']:.0f}ms |")
-    L(f"| Min | {lat_direct['min_ms']:.0f}ms | {lat_proxy['min_ms']:.0f}ms | |")
-    L(f"| Max | {lat_direct['max_ms']:.0f}ms | {lat_proxy['max_ms']:.0f}ms | |")
-    if lat_direct['mean_ms'] > 0:
-        overhead_pct = ((lat_proxy['mean_ms'] - lat_direct['mean_ms']) / lat_direct['mean_ms']) * 100
-        L(f"| **Overhead %** | - | - | **{overhead_pct:+.1f}%** |")
-    L("")
+    overhead_row = ""
+    if d_mean > 0:
+        overhead_pct = ((p_mean - d_mean) / d_mean) * 100
+        overhead_row = f"| **Overhead %** | - | - | **{overhead_pct:+.1f}%** |\n"
+    latency_table = f"""## Latency Analysis
+
+| Metric | Direct | Proxy | Overhead |
+|--------|--------|-------|----------|
+| Mean | {d_mean:.0f}ms | {p_mean:.0f}ms | +{p_mean - d_mean:.0f}ms |
+| Median | {lat_direct['median_ms']:.0f}ms | {lat_proxy['median_ms']:.0f}ms | +{lat_proxy['median_ms'] - lat_direct['median_ms']:.0f}ms |
+| Min | {lat_direct['min_ms']:.0f}ms | {lat_proxy['min_ms']:.0f}ms | |
+| Max | {lat_direct['max_ms']:.0f}ms | {lat_proxy['max_ms']:.0f}ms | |
+{overhead_row}
+"""
 
     # ---- Sample Responses ----
-    L("## Sample Responses (Selected Tests)")
-    L("")
     # Pick a few interesting test IDs
     samples = ["PF-01-name-age", "MT-01-project-hw", "CT-01-sister", "PR-02-server"]
+    direct_by_id = {r.test_id: r for r in direct.results}
+    proxy_by_id = {r.test_id: r for r in proxy.results}
+    sample_blocks = []
     for sid in samples:
-        dr = next((r for r in direct.results if r.test_id == sid), None)
-        pr = next((r for r in proxy.results if r.test_id == sid), None)
+        dr = direct_by_id.get(sid)
+        pr = proxy_by_id.get(sid)
         if not dr or not pr:
             continue
-        L(f"### {sid}: {dr.query}")
-        L(f"")
-        L(f"**Expected keywords:** {', '.join(dr.expected_keywords)}")
-        L(f"")
-        L(f"**Direct (score: {dr.score:.0%}):**")
-        L(f"> {dr.response[:300]}")
-        L(f"")
-        L(f"**Proxy (score: {pr.score:.0%}):**")
-        L(f"> {pr.response[:300]}")
-        L(f"")
+        sample_blocks.append(f"""### {sid}: {dr.query}
+
+**Expected keywords:** {', '.join(dr.expected_keywords)}
+
+**Direct (score: {dr.score:.0%}):**
+> {dr.response[:300]}
+
+**Proxy (score: {pr.score:.0%}):**
+> {pr.response[:300]}
+
+""")
+    sample_section = "## Sample Responses (Selected Tests)\n\n" + "".join(sample_blocks)
 
     # ---- Methodology ----
-    L("## Methodology")
-    L("")
-    L("1. **Seed phase:** Facts are sent as individual chat messages to establish memory context")
-    L("2. **Query phase:** Questions are asked in a **brand-new conversation** (no chat history)")
-    L("3. **Scoring:** Keyword presence check (case-insensitive) against expected facts")
-    L("4. **Pass criteria:** >=80% keywords found = PASS, >=40% = PARTIAL, <40% = FAIL")
-    L("5. **Direct mode:** Queries go straight to Ollama (no memory) - LLM has no prior context")
-    L("6. **Proxy mode:** Queries go through memory proxy which injects relevant past conversations")
-    L("7. **Latency:** Measured separately with minimal queries to isolate proxy overhead")
-    L("8. **Temperature:** 0.1 for reproducibility")
-    L("")
-
-    report_text = "\n".join(lines)
+    methodology = """## Methodology
+
+1. **Seed phase:** Facts are sent as individual chat messages to establish memory context
+2. **Query phase:** Questions are asked in a **brand-new conversation** (no chat history)
+3. **Scoring:** Keyword presence check (case-insensitive) against expected facts
+4. **Pass criteria:** >=80% keywords found = PASS, >=40% = PARTIAL, <40% = FAIL
+5. **Direct mode:** Queries go straight to Ollama (no memory) - LLM has no prior context
+6. **Proxy mode:** Queries go through memory proxy which injects relevant past conversations
+7. **Latency:** Measured separately with minimal queries to isolate proxy overhead
+8. **Temperature:** 0.1 for reproducibility
+"""
+
+    report_text = (
+        header + summary + category_table + detail_table
+        + latency_table + sample_section + methodology
+    )
 
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(report_text)
@@ -493,7 +863,103 @@ def generate_report(
 # Main
 # ---------------------------------------------------------------------------
 
+async def run_phases(
+    sequential: bool = False,
+    concurrency: int = 1,
+    force: bool = False,
+) -> Tuple[BenchmarkRun, BenchmarkRun, Dict[str, Any], Dict[str, Any]]:
+    """Run phases 1-4 in one event loop so the shared clients stay alive.
+
+    Phases 2 and 3 hit different endpoints and run concurrently unless
+    `sequential` is set (e.g. when both ports share one GPU). `concurrency`
+    is the number of in-flight latency rounds in Phase 4. `force` ignores
+    query results cached by a previous run.
+    """
+    try:
+        # --- Phase 1: Seed all facts through the PROXY (builds memory) ---
+        print(f"\n{'='*70}")
+        print("PHASE 1: Seeding facts through memory proxy")
+        print(f"{'='*70}")
+        # Unique seeds in first-seen order
+        all_seeds = list(dict.fromkeys(seed for test in TESTS for seed in test.seeds))
+
+        print(f"  Seeding {len(all_seeds)} unique fact messages...")
+        load_seed_cache()
+        seed_latencies = await seed_all(PROXY_URL, all_seeds)
+        save_seed_cache()
+
+        if seed_latencies:
+            print(f"  Waiting {SETTLING_DELAY}s for background storage...")
+            await asyncio.sleep(SETTLING_DELAY)
+            print(f"  Seeding complete. Mean latency: {statistics.mean(seed_latencies):.0f}ms")
+        else:
+            print(f"  All seeds already sent by a previous run "
+                  f"(delete {SEED_CACHE_PATH} to reseed).")
+
+        if sequential:
+            # --- Phase 2: Run queries against DIRECT Ollama (no memory) ---
+            print(f"\n{'='*70}")
+            print("PHASE 2: Querying DIRECT Ollama (no memory)")
+            print(f"{'='*70}")
+            direct_run = await run_benchmark("direct", DIRECT_URL, force=force)
+
+            # --- Phase 3: Run queries against PROXY (with memory) ---
+            print(f"\n{'='*70}")
+            print("PHASE 3: Querying MEMORY PROXY (with memory)")
+            print(f"{'='*70}")
+            proxy_run = await run_benchmark("proxy", PROXY_URL, force=force)
+        else:
+            # --- Phases 2+3: DIRECT [D] and PROXY [P] queried concurrently ---
+            print(f"\n{'='*70}")
+            print("PHASE 2+3: Querying DIRECT [D] and MEMORY PROXY [P] concurrently")
+            print(f"{'='*70}")
+            direct_run, proxy_run = await asyncio.gather(
+                run_benchmark("direct", DIRECT_URL, force=force),
+                run_benchmark("proxy", PROXY_URL, force=force),
+            )
+
+        # --- Phase 4: Latency benchmark ---
+        print(f"\n{'='*70}")
+        print("PHASE 4: Latency Overhead Measurement")
+        print(f"{'='*70}")
+        lat_direct = await run_latency_benchmark(
+            DIRECT_URL, "direct", n_rounds=5, concurrency=concurrency
+        )
+        lat_proxy = await run_latency_benchmark(
+            PROXY_URL, "proxy", n_rounds=5, concurrency=concurrency
+        )
+    finally:
+        await close_clients()
+
+    return direct_run, proxy_run, lat_direct, lat_proxy
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ollama Memory Proxy benchmark")
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="run the DIRECT and PROXY query phases one after the other "
+             "(use when both endpoints share one GPU)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="latency rounds in flight at once in Phase 4 "
+             "(1 = serial latency, >1 = latency under concurrent load)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-run every query instead of reusing results cached in .bench_cache/",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     print("=" * 70)
     print("  OLLAMA MEMORY PROXY - COMPREHENSIVE BENCHMARK")
     print("=" * 70)
@@ -519,76 +985,13 @@ def main():
         print(f"  Memory proxy:    FAILED - {e}")
         sys.exit(1)
 
-    # --- Phase 1: Seed all facts through the PROXY (builds memory) ---
-    print(f"\n{'='*70}")
-    print("PHASE 1: Seeding facts through memory proxy")
-    print(f"{'='*70}")
-    all_seeds = []
-    for test in TESTS:
-        for seed in test["seeds"]:
-            if seed not in all_seeds:
-                all_seeds.append(seed)
-
-    print(f"  Seeding {len(all_seeds)} unique fact messages...")
-    seed_latencies = []
-    for i, seed in enumerate(all_seeds, 1):
-        lat = seed_fact(PROXY_URL, seed)
-        seed_latencies.append(lat)
-        print(f"    [{i}/{len(all_seeds)}] {seed[:60]}... ({lat:.0f}ms)")
-
-    print(f"  Waiting {SETTLING_DELAY}s for background storage...")
-    time.sleep(SETTLING_DELAY)
-    print(f"  Seeding complete. Mean latency: {statistics.mean(seed_latencies):.0f}ms")
-
-    # --- Phase 2: Run queries against DIRECT Ollama (no memory) ---
-    print(f"\n{'='*70}")
-    print("PHASE 2: Querying DIRECT Ollama (no memory)")
-    print(f"{'='*70}")
-    direct_run = BenchmarkRun(mode="direct", url=DIRECT_URL, model=MODEL)
-    t0 = time.perf_counter()
-    total = len(TESTS)
-    for i, test in enumerate(TESTS, 1):
-        tid = test["id"]
-        print(f"  [{i}/{total}] {tid} ...", end=" ", flush=True)
-        response, query_lat = query_fresh(DIRECT_URL, test["query"])
-        found, missing, sc = score_response(response, test["expected"])
-        pf = pass_fail(sc)
-        direct_run.results.append(TestResult(
-            test_id=tid, category=test["category"], query=test["query"],
-            expected_keywords=test["expected"], response=response[:500],
-            keywords_found=found, keywords_missing=missing,
-            score=sc, latency_ms=query_lat, pass_fail=pf,
-        ))
-        print(f"{pf} (score={sc:.0%}, {query_lat:.0f}ms)")
-    direct_run.total_time_s = time.perf_counter() - t0
-
-    # --- Phase 3: Run queries against PROXY (with memory) ---
-    print(f"\n{'='*70}")
-    print("PHASE 3: Querying MEMORY PROXY (with memory)")
-    print(f"{'='*70}")
-    proxy_run = BenchmarkRun(mode="proxy", url=PROXY_URL, model=MODEL)
-    t0 = time.perf_counter()
-    for i, test in enumerate(TESTS, 1):
-        tid = test["id"]
-        print(f"  [{i}/{total}] {tid} ...", end=" ", flush=True)
-        response, query_lat = query_fresh(PROXY_URL, test["query"])
-        found, missing, sc = score_response(response, test["expected"])
-        pf = pass_fail(sc)
-        proxy_run.results.append(TestResult(
-            test_id=tid, category=test["category"], query=test["query"],
-            expected_keywords=test["expected"], response=response[:500],
-            keywords_found=found, keywords_missing=missing,
-            score=sc, latency_ms=query_lat, pass_fail=pf,
-        ))
-        print(f"{pf} (score={sc:.0%}, {query_lat:.0f}ms)")
-    proxy_run.total_time_s = time.perf_counter() - t0
-
-    # --- Phase 4: Latency benchmark ---
-    print(f"\n{'='*70}")
-    print("PHASE 4: Latency Overhead Measurement")
-    print(f"{'='*70}")
-    lat_direct = run_latency_benchmark(DIRECT_URL, "direct", n_rounds=5)
-    lat_proxy = run_latency_benchmark(PROXY_URL, "proxy", n_rounds=5)
+    direct_run, proxy_run, lat_direct, lat_proxy = asyncio.run(
+        run_phases(
+            sequential=args.sequential,
+            concurrency=args.concurrency,
+            force=args.force,
+        )
+    )
 
     # --- Phase 5: Generate report ---
     print(f"\n{'='*70}")
@@ -602,10 +1005,12 @@ def main():
     report = generate_report(direct_run, proxy_run, lat_direct, lat_proxy, report_path)
 
     # Print summary to console
-    d_avg = statistics.mean([r.score for r in direct_run.results]) * 100
-    p_avg = statistics.mean([r.score for r in proxy_run.results]) * 100
-    d_pass = sum(1 for r in direct_run.results if r.pass_fail == "PASS")
-    p_pass = sum(1 for r in proxy_run.results if r.pass_fail == "PASS")
+    d_stats = _aggregate(direct_run.results)
+    p_stats = _aggregate(proxy_run.results)
+    d_avg = d_stats["avg_score"] * 100
+    p_avg = p_stats["avg_score"] * 100
+    d_pass = d_stats["passed"]
+    p_pass = p_stats["passed"]
 
     print(f"\n{'='*70}")
     print("  RESULTS SUMMARY")
@@ -645,8 +1050,11 @@ def main():
         },
         "latency": {"direct": lat_direct, "proxy": lat_proxy},
     }
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(raw, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        Path(json_path).write_bytes(orjson.dumps(raw, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(raw, f, indent=2, ensure_ascii=False)
     print(f"  Raw JSON saved to:   {json_path}")
 
 
@@ -10,20 +10,65 @@ class ProxyConfig:
     proxy_host: str = "127.0.0.1"
     proxy_port: int = 11434
     ollama_base_url: str = "http://127.0.0.1:11436"
+    # Keep-alive pool towards Ollama (HTTP/1.1: one request per connection)
+    upstream_max_connections: int = 100
+    upstream_keepalive_s: float = 30.0
+    # Server processes. Each one loads its own copy of the memory store and
+    # appends to the same files, so keep this at 1 unless the store is shared
+    workers: int = 1
 
     # Embedding
+    # Device defaults to CPU to keep GPU VRAM free for the LLM.
+    # "auto" picks CUDA when available (FP16), otherwise CPU.
     embedding_model: str = "all-MiniLM-L6-v2"
     embedding_dim: int = 384
     embedding_device: str = "cpu"
+    # "torch" or "onnx" (sentence-transformers >= 3.2 with optimum[onnxruntime]),
+    # or "ollama" to embed via the Ollama server with an Ollama embedding model
+    embedding_backend: str = "torch"
+    embedding_cache_size: int = 1024  # LRU entries; 0 disables the cache
+    # Threads embedding search queries (the model is mostly serial anyway)
+    embedding_workers: int = 2
 
     # Memory - absolute path so it works regardless of working directory
     memory_storage_path: str = os.path.join(
         os.path.dirname(os.path.abspath(__file__)), "ollama_memory_data"
     )
+    # Assistant replies longer than this are truncated before being stored
+    max_stored_chars: int = 16000
+    # Conversations finishing within this window are embedded in one batch
+    # before being stored (0 disables; stores are background work, so the
+    # delay is invisible to clients)
+    embed_batch_window_ms: float = 50.0
+    embed_batch_max: int = 32  # conversations per batch (up to 2 texts each)
+    # Threads embedding and storing finished conversations (batches, when
+    # batching is on), apart from the query threads; the rest queue up
+    store_concurrency: int = 2
+    # Stored memories are fsynced by a background task at most this often
+    save_interval_s: float = 5.0
 
     # Search
     search_top_k: int = 15
     similarity_threshold: float = 0.3
+    # "flat" (exact), "hnsw" (approximate, needs faiss) or "auto":
+    # switch to HNSW once the store holds hnsw_threshold vectors
+    index_type: str = "auto"
+    hnsw_threshold: int = 10000
+    # "float32" or "int8" (4x less RAM/disk/bandwidth, scores ~1e-2 approximate)
+    vector_dtype: str = "float32"
+    # Coalesce searches arriving within this window into one batched matrix
+    # pass (0 disables; worth enabling under concurrent load)
+    search_batch_window_ms: float = 0.0
+    search_batch_max: int = 32
+    # Skip the embedding pass when retrieval can't help: too few memories for
+    # meaningful similarity, or a query too short to carry signal ("hi").
+    # Shorter user messages are not stored either.
+    min_memories_for_search: int = 5
+    min_query_chars: int = 8
+    # Answer a single-turn chat from memory, without calling Ollama, when an
+    # earlier question to the same model matches at least this closely
+    # (0 disables; 0.95+ recommended)
+    cache_hit_threshold: float = 0.0
 
     # Context Injection
     max_context_items: int = 10
@@ -31,16 +76,52 @@ class ProxyConfig:
 
     @classmethod
     def from_env(cls) -> "ProxyConfig":
+        env = os.environ
+
+        def get(name, default, cast=str):
+            # Only cast values that are actually set; defaults are already typed
+            value = env.get(name)
+            return cast(value) if value is not None else default
+
         return cls(
-            proxy_host=os.getenv("PROXY_HOST", cls.proxy_host),
-            proxy_port=int(os.getenv("PROXY_PORT", str(cls.proxy_port))),
-            ollama_base_url=os.getenv("OLLAMA_BASE_URL", cls.ollama_base_url),
-            embedding_model=os.getenv("EMBEDDING_MODEL", cls.embedding_model),
-            memory_storage_path=os.getenv(
-                "MEMORY_STORAGE_PATH", cls.memory_storage_path
+            proxy_host=get("PROXY_HOST", cls.proxy_host),
+            proxy_port=get("PROXY_PORT", cls.proxy_port, int),
+            ollama_base_url=get("OLLAMA_BASE_URL", cls.ollama_base_url),
+            upstream_max_connections=get(
+                "UPSTREAM_MAX_CONNECTIONS", cls.upstream_max_connections, int
+            ),
+            upstream_keepalive_s=get(
+                "UPSTREAM_KEEPALIVE_S", cls.upstream_keepalive_s, float
+            ),
+            workers=get("WORKERS", cls.workers, int),
+            embedding_model=get("EMBEDDING_MODEL", cls.embedding_model),
+            embedding_device=get("EMBEDDING_DEVICE", cls.embedding_device),
+            embedding_backend=get("EMBEDDING_BACKEND", cls.embedding_backend),
+            embedding_workers=get("EMBEDDING_WORKERS", cls.embedding_workers, int),
+            memory_storage_path=get("MEMORY_STORAGE_PATH", cls.memory_storage_path),
+            max_stored_chars=get("MAX_STORED_CHARS", cls.max_stored_chars, int),
+            embed_batch_window_ms=get(
+                "EMBED_BATCH_WINDOW_MS", cls.embed_batch_window_ms, float
+            ),
+            embed_batch_max=get("EMBED_BATCH_MAX", cls.embed_batch_max, int),
+            store_concurrency=get("STORE_CONCURRENCY", cls.store_concurrency, int),
+            save_interval_s=get("SAVE_INTERVAL_S", cls.save_interval_s, float),
+            similarity_threshold=get(
+                "SIMILARITY_THRESHOLD", cls.similarity_threshold, float
+            ),
+            search_top_k=get("SEARCH_TOP_K", cls.search_top_k, int),
+            index_type=get("INDEX_TYPE", cls.index_type),
+            hnsw_threshold=get("HNSW_THRESHOLD", cls.hnsw_threshold, int),
+            vector_dtype=get("VECTOR_DTYPE", cls.vector_dtype),
+            search_batch_window_ms=get(
+                "SEARCH_BATCH_WINDOW_MS", cls.search_batch_window_ms, float
+            ),
+            search_batch_max=get("SEARCH_BATCH_MAX", cls.search_batch_max, int),
+            min_memories_for_search=get(
+                "MIN_MEMORIES_FOR_SEARCH", cls.min_memories_for_search, int
             ),
-            similarity_threshold=float(
-                os.getenv("SIMILARITY_THRESHOLD", str(cls.similarity_threshold))
+            min_query_chars=get("MIN_QUERY_CHARS", cls.min_query_chars, int),
+            cache_hit_threshold=get(
+                "CACHE_HIT_THRESHOLD", cls.cache_hit_threshold, float
             ),
-            search_top_k=int(os.getenv("SEARCH_TOP_K", str(cls.search_top_k))),
         )
@@ -1,5 +1,6 @@
 import time
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
 
 from config import ProxyConfig
 
@@ -31,11 +32,11 @@ def build_memory_block(
     parts = [MEMORY_BASE_PROMPT]
 
     if results:
-        lines = _format_memory_lines(results, config)
-        if lines:
+        memory_text = _memory_text(results, config)
+        if memory_text:
             parts.append(
                 f"\n\n=== YOUR MEMORY ({total_memories} total stored) ===\n"
-                + "\n".join(lines)
+                + memory_text
                 + "\n=== END MEMORY ==="
             )
     elif total_memories > 0:
@@ -49,32 +50,73 @@ def build_memory_block(
     return "".join(parts)
 
 
+# Recently formatted memory sections. Retrieval sets repeat (follow-ups on
+# one topic, retries), and a section is fully determined by which memories
+# it shows, their rounded relevance and the time. Ages are shown in whole
+# minutes, so reusing a section within a clock minute is at most a minute off.
+_MEMORY_TEXT_CACHE_SIZE = 256
+_memory_text_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+
+
+def _memory_text(results: List[Dict[str, Any]], config: ProxyConfig) -> str:
+    """The formatted memory lines for results, reusing a recent identical one."""
+    now = time.time()
+    shown = results[: config.max_context_items]
+    key = (
+        tuple(r["ctx_id"] for r in shown),
+        tuple(int(r["similarity"] * 100 + 0.5) for r in shown),
+        int(now // 60),
+        config.max_context_chars,
+    )
+    text = _memory_text_cache.get(key)
+    if text is not None:
+        _memory_text_cache.move_to_end(key)
+        return text
+    text = "\n".join(_format_memory_lines(shown, config, now))
+    _memory_text_cache[key] = text
+    if len(_memory_text_cache) > _MEMORY_TEXT_CACHE_SIZE:
+        _memory_text_cache.popitem(last=False)
+    return text
+
+
+# One memory line, and its length excluding the four fields
+_LINE_FORMAT = "[%s] (%s, relevance: %d%%): %s"
+_LINE_OVERHEAD = len(_LINE_FORMAT % ("", "", 0, "")) - 1
+# Shortest truncated text worth showing when the budget is nearly spent
+_MIN_SNIPPET_CHARS = 20
+
+
 def _format_memory_lines(
     results: List[Dict[str, Any]],
     config: ProxyConfig,
+    now: float,
 ) -> List[str]:
     """Format search results into individual memory lines."""
     lines = []
     total_chars = 0
 
     for r in results[: config.max_context_items]:
-        meta = r["metadata"]
-        text = meta.get("text", "")
-        role = meta.get("role", "unknown")
-        sim = r["similarity"]
-        ts = meta.get("timestamp", 0)
-
-        age = _format_age(ts)
-
         remaining_budget = config.max_context_chars - total_chars
         if remaining_budget <= 0:
             break
 
-        if len(text) > remaining_budget:
-            text = text[:remaining_budget] + "..."
+        meta = r["metadata"]
+        text = meta.get("text", "")
+        role = meta.get("role", "unknown")
+        pct = int(r["similarity"] * 100 + 0.5)
+        age = _format_age(meta.get("timestamp", 0), now)
+
+        # Size the line before building it; skip results that can't fit
+        # at least a useful snippet of their text
+        line_overhead = _LINE_OVERHEAD + len(role) + len(age) + len(str(pct))
+        room = remaining_budget - line_overhead
+        if room < min(len(text), _MIN_SNIPPET_CHARS):
+            continue
+        if len(text) > room:
+            text = text[: room - 3] + "..."
 
-        lines.append(f"[{role}] ({age}, relevance: {sim:.0%}): {text}")
-        total_chars += len(lines[-1])
+        lines.append(_LINE_FORMAT % (role, age, pct, text))
+        total_chars += line_overhead + len(text)
 
     return lines
 
@@ -86,21 +128,19 @@ def inject_context_into_messages(
     """Inject memory context into the message list.
 
     If a system message exists as the first message, appends to it.
-    Otherwise prepends a new system message.
+    Otherwise prepends a new system message. Only the first message is
+    copied; the rest are shared with the caller's list.
     """
     if not context_block:
         return messages
 
-    messages = [m.copy() for m in messages]
-
     if messages and messages[0].get("role") == "system":
-        messages[0]["content"] = (
-            messages[0]["content"] + "\n\n---\n" + context_block
-        )
-    else:
-        messages.insert(0, {"role": "system", "content": context_block})
+        first = messages[0]
+        new = list(messages)
+        new[0] = {**first, "content": first["content"] + "\n\n---\n" + context_block}
+        return new
 
-    return messages
+    return [{"role": "system", "content": context_block}, *messages]
 
 
 def inject_context_into_system(
@@ -119,15 +159,20 @@ def inject_context_into_system(
     return context_block
 
 
-def _format_age(timestamp: float) -> str:
+# (upper bound in seconds, unit in seconds, suffix) for _format_age
+_AGE_BUCKETS = (
+    (3600, 60, "m ago"),
+    (86400, 3600, "h ago"),
+    (float("inf"), 86400, "d ago"),
+)
+
+
+def _format_age(timestamp: float, now: float) -> str:
     if timestamp <= 0:
         return "unknown time"
-    delta = time.time() - timestamp
+    delta = now - timestamp
     if delta < 60:
         return "just now"
-    elif delta < 3600:
-        return f"{int(delta / 60)}m ago"
-    elif delta < 86400:
-        return f"{int(delta / 3600)}h ago"
-    else:
-        return f"{int(delta / 86400)}d ago"
+    for limit, unit, suffix in _AGE_BUCKETS:
+        if delta < limit:
+            return f"{int(delta / unit)}{suffix}"
@@ -1,33 +1,197 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
 from config import ProxyConfig
 
+logger = logging.getLogger(__name__)
+
 
 class Embedder:
     """Singleton wrapper for sentence-transformers embedding model.
 
     Uses all-MiniLM-L6-v2 on CPU to produce 384-dim L2-normalized vectors.
-    Runs on CPU to keep GPU VRAM free for the LLM.
+    Runs on CPU by default to keep GPU VRAM free for the LLM; with
+    embedding_device="cuda" (or "auto" and a GPU present) the model runs
+    on GPU in FP16. The ONNX Runtime backend can be selected instead of
+    PyTorch via embedding_backend="onnx".
+
+    Recent embeddings are kept in an LRU cache keyed by a BLAKE2b-128 digest
+    of the text, so retries and regenerations skip the forward pass.
     """
 
     def __init__(self, config: ProxyConfig):
+        device = config.embedding_device
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        on_gpu = device.startswith("cuda")
+
+        kwargs = {}
+        if config.embedding_backend != "torch":
+            kwargs["backend"] = config.embedding_backend
+            if on_gpu:
+                kwargs["model_kwargs"] = {"provider": "CUDAExecutionProvider"}
+
         self._model = SentenceTransformer(
             config.embedding_model,
-            device=config.embedding_device,
+            device=device,
+            **kwargs,
         )
+        if on_gpu and config.embedding_backend == "torch":
+            self._model.half()
+        self._model.eval()
+        if not on_gpu:
+            torch.set_num_threads(os.cpu_count() or 1)
+            try:
+                # Only settable before torch runs any parallel work
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass
+        self._device = device
         self._dim = config.embedding_dim
+        self._init_cache(config)
+
+    def _init_cache(self, config: ProxyConfig):
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_size = config.embedding_cache_size
+        self._cache_lock = threading.Lock()
+
+    def _encode(self, texts: list) -> np.ndarray:
+        """Run the model on texts. Returns L2-normalized rows, shape (N, dim)."""
+        with torch.inference_mode():
+            return self._model.encode(texts, normalize_embeddings=True)
 
     def embed(self, text: str) -> np.ndarray:
         """Embed a single text string into a 384-dim float32 vector."""
-        vector = self._model.encode(text, normalize_embeddings=True)
-        return vector.astype(np.float32)
+        key = _cache_key(text)
+        vector = self._cache_get(key)
+        if vector is None:
+            vector = self._cache_put(key, self._encode([text])[0].astype(np.float32))
+        return vector
 
     def embed_batch(self, texts: list) -> np.ndarray:
-        """Embed multiple texts. Returns shape (N, 384)."""
-        vectors = self._model.encode(texts, normalize_embeddings=True)
-        return vectors.astype(np.float32)
+        """Embed multiple texts. Returns shape (N, 384).
+
+        Only texts missing from the cache are sent to the model, in one batch.
+        """
+        keys = [_cache_key(t) for t in texts]
+        vectors = [self._cache_get(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = self._encode([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded.astype(np.float32)):
+                vectors[i] = self._cache_put(keys[i], vector)
+        return np.stack(vectors) if vectors else np.empty((0, self._dim), np.float32)
+
+    def _cache_get(self, key: bytes):
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+            return vector
+
+    def _cache_put(self, key: bytes, vector: np.ndarray) -> np.ndarray:
+        # Cached arrays are shared between callers, so make them read-only
+        vector.flags.writeable = False
+        if self._cache_size <= 0:
+            return vector
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return vector
 
     @property
     def dim(self) -> int:
         return self._dim
+
+    @property
+    def device(self) -> str:
+        return self._device
+
+
+class OllamaEmbedder(Embedder):
+    """Embeds through the Ollama server instead of a local model.
+
+    Selected with embedding_backend="ollama"; embedding_model then names an
+    Ollama embedding model (e.g. nomic-embed-text). Texts are sent in one
+    /api/embed request per batch, falling back to one legacy
+    /api/embeddings request per text on servers without /api/embed. The
+    vector dimension is probed from the model at startup.
+    """
+
+    def __init__(self, config: ProxyConfig):
+        self._client = httpx.Client(base_url=config.ollama_base_url, timeout=60.0)
+        self._model_name = config.embedding_model
+        self._legacy_api = False
+        self._init_cache(config)
+        self._dim = len(self._encode(["dimension probe"])[0])
+
+    def _encode(self, texts: list) -> np.ndarray:
+        if not self._legacy_api:
+            response = self._client.post(
+                "/api/embed", json={"model": self._model_name, "input": texts}
+            )
+            try:
+                if response.status_code != 404:
+                    response.raise_for_status()
+                    vectors = np.asarray(response.json()["embeddings"], dtype=np.float32)
+                    return _normalize_rows(vectors)
+            except KeyError:
+                pass
+            # Ollama also answers 404 for a model that isn't pulled, with a JSON
+            # error; servers without /api/embed return a plain-text 404 page
+            error = _ollama_error(response)
+            if error is not None:
+                raise RuntimeError(f"Ollama /api/embed failed: {error}")
+            logger.info("Ollama has no /api/embed; using /api/embeddings per text")
+            self._legacy_api = True
+
+        vectors = []
+        for text in texts:
+            response = self._client.post(
+                "/api/embeddings", json={"model": self._model_name, "prompt": text}
+            )
+            response.raise_for_status()
+            vectors.append(response.json()["embedding"])
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+    @property
+    def device(self) -> str:
+        return "ollama"
+
+
+def create_embedder(config: ProxyConfig) -> Embedder:
+    """Build the embedder selected by config.embedding_backend."""
+    if config.embedding_backend == "ollama":
+        return OllamaEmbedder(config)
+    return Embedder(config)
+
+
+def _ollama_error(response: httpx.Response) -> Optional[str]:
+    """The message of an Ollama {"error": ...} response, or None."""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict) and isinstance(body.get("error"), str):
+        return body["error"]
+    return None
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _cache_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
@@ -1,24 +1,165 @@
+import os
 import time
+import heapq
 import pickle
+import struct
 import logging
 import threading
 import numpy as np
+import orjson
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-
-import faiss
+from typing import List, Dict, Any, Optional, Tuple
 
 from config import ProxyConfig
 
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import simsimd  # SIMD dot-product kernels
+except ImportError:
+    simsimd = None
+
 logger = logging.getLogger(__name__)
 
 
+# Initial row capacity of the vector matrix; doubled whenever it fills up
+_INITIAL_CAPACITY = 1024
+
+# Append-only store: one memory-mapped vector file per dtype, fixed-width
+# records in meta.rec, and the text plus any extra metadata (as JSON) of each
+# record back to back in texts.bin at blob_off. A record is live once its
+# entry in meta.rec and its blob are both on disk.
+_VECTOR_FILES = {"float32": "vectors.f32", "int8": "vectors.i8"}
+_RECORDS_FILE = "meta.rec"
+_TEXTS_FILE = "texts.bin"
+# Dimension and dtype of the saved vectors, so rows are never read back with
+# another width
+_INFO_FILE = "store.json"
+_REC = struct.Struct("<Qd16s64sQII")
+_REC_DTYPE = np.dtype([
+    ("ctx_id", "<u8"),
+    ("timestamp", "<f8"),
+    ("role", "S16"),
+    ("model", "S64"),
+    ("blob_off", "<u8"),
+    ("text_len", "<u4"),
+    ("extra_len", "<u4"),
+])
+
+# HNSW graph parameters (neighbors per node, build and query beam widths)
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_EF_SEARCH = 64
+# Saved HNSW graph, so restarts don't rebuild it from the matrix
+_HNSW_FILE = "hnsw.faiss"
+
+
+# int8 storage maps unit-vector components [-1, 1] linearly onto [-127, 127]
+_I8_SCALE = 127.0
+_I8_INV_SCALE2 = np.float32(1.0 / (_I8_SCALE * _I8_SCALE))
+# Rows widened to float32 per step on the NumPy int8 path
+_I8_BLOCK = 8192
+
+
+def _simsimd_scores(queries: np.ndarray, xb: np.ndarray) -> np.ndarray:
+    """(len(queries), len(xb)) inner products via SimSIMD.
+
+    Both sides share a dtype; int8 products are exact integers (they stay
+    below 2**24, so float32 holds them exactly) and still need rescaling.
+    """
+    scores = simsimd.cdist(queries, xb, metric="dot")
+    return np.asarray(scores, dtype=np.float32)
+
+
+class StoreMismatchError(RuntimeError):
+    """The saved store can't be read with the configured embedding dimension."""
+
+
+def _quantize(x: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(x * _I8_SCALE), -127, 127).astype(np.int8)
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _scores_f32(xb, n, q):
+        """Inner products of xb[:n] (float32) with q."""
+        d = q.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += xb[i, j] * q[j]
+            scores[i] = acc
+        return scores
+
+    @njit(cache=True, parallel=True)
+    def _scores_i8(xb, n, q):
+        """Inner products of xb[:n] (int8) with int8 q, int32 accumulate, rescaled."""
+        d = q.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = np.int32(0)
+            for j in range(d):
+                acc += np.int32(xb[i, j]) * np.int32(q[j])
+            scores[i] = acc * _I8_INV_SCALE2
+        return scores
+
+    @njit(cache=True)
+    def _topk(scores, k, thr):
+        """Indices of the k best scores >= thr, best first, via a bounded min-heap."""
+        # heap[0] is the weakest kept score
+        heap = [(np.float32(0.0), 0) for _ in range(0)]
+        for i in range(scores.shape[0]):
+            s = scores[i]
+            if s < thr:
+                continue
+            if len(heap) < k:
+                heapq.heappush(heap, (s, i))
+            elif s > heap[0][0]:
+                heapq.heapreplace(heap, (s, i))
+
+        m = len(heap)
+        out_scores = np.empty(m, dtype=np.float32)
+        out_idx = np.empty(m, dtype=np.int64)
+        for j in range(m - 1, -1, -1):
+            s, i = heapq.heappop(heap)
+            out_scores[j] = s
+            out_idx[j] = i
+        return out_scores, out_idx
+
+else:
+    _scores_f32 = _scores_i8 = _topk = None
+
+
 class MemoryManager:
-    """Manages conversation memory using FAISS directly with raw embeddings.
+    """Manages conversation memory as a preallocated NumPy embedding matrix.
 
     Bypasses FCPE encoding (which collapses single-vector inputs to identical
     vectors) and stores L2-normalized embeddings as-is.  Inner product on
     unit vectors = cosine similarity, giving real semantic ranking.
+
+    Vectors live row-wise in one contiguous float32 (or, with
+    vector_dtype="int8", linearly quantized int8) array memory-mapped onto
+    a file that grows geometrically. Metadata is kept as fixed-width records
+    aligned with the matrix rows, and texts are appended to a blob file and
+    only read back for the results a search returns. An insert is a row
+    copy plus two appends; a search is a single BLAS matrix-vector product
+    (a SimSIMD kernel when simsimd is installed) followed by an argpartition
+    top-k, or a parallel Numba kernel with a bounded heap when numba is
+    installed.
+
+    With index_type="hnsw" (or "auto" once the store reaches hnsw_threshold)
+    a FAISS HNSW graph is built from the matrix in a background thread and
+    takes over searches when ready; the matrix stays the source of truth.
     """
 
     def __init__(self, config: ProxyConfig):
@@ -30,39 +171,395 @@ class MemoryManager:
         self._lock = threading.Lock()
 
         # Paths for persistence
-        self._faiss_path = self._storage_path / "faiss_index.bin"
-        self._meta_path = self._storage_path / "metadata.pkl"
+        self._dtype = np.dtype(config.vector_dtype)
+        self._row_bytes = self._dim * self._dtype.itemsize
+        self._vectors_path = self._storage_path / _VECTOR_FILES[self._dtype.name]
+        self._records_path = self._storage_path / _RECORDS_FILE
+        self._texts_path = self._storage_path / _TEXTS_FILE
+        self._hnsw_path = self._storage_path / _HNSW_FILE
+        self._info_path = self._storage_path / _INFO_FILE
+        # Written by older versions (JSON-lines log, or pickle + .npy or FAISS
+        # IndexFlatIP); migrated into the current format on load
+        self._jsonl_path = self._storage_path / "meta.jsonl"
+        self._legacy_meta_path = self._storage_path / "metadata.pkl"
+        self._legacy_vectors_path = self._storage_path / "vectors.npy"
+        self._legacy_faiss_path = self._storage_path / "faiss_index.bin"
 
-        # Metadata store: id -> dict
-        self._metadata: Dict[int, Dict[str, Any]] = {}
-        self._id_map: List[int] = []  # position -> context_id
+        # Metadata records, row-aligned with the embedding matrix
+        self._recs = np.empty(_INITIAL_CAPACITY, dtype=_REC_DTYPE)
         self._next_id = 0
 
-        # Load existing or create new FAISS index
-        if self._faiss_path.exists() and self._meta_path.exists():
+        # Embedding matrix, memory-mapped onto the vector file:
+        # rows [0, _n) are live, the rest is spare capacity
+        self._vec_file = None
+        self._rec_file = None
+        self._texts_file = None
+        self._texts_reader = None  # separate handle for lazy text reads
+        self._read_lock = threading.Lock()
+        self._mm: Optional[np.memmap] = None
+        self._xb: Optional[np.ndarray] = None
+        self._n = 0
+        # Scratch row for normalizing stored/query vectors (used under the lock)
+        self._vbuf = np.empty((1, self._dim), dtype=np.float32)
+
+        # Approximate index, published by the background build once complete
+        if faiss is not None:
+            faiss.omp_set_num_threads(os.cpu_count() or 1)
+        self._hnsw = None
+        self._hnsw_building = False
+        self._hnsw_saved = 0  # vectors in the graph on disk
+
+        # Load existing state, migrate an older one, or start empty
+        if self._records_path.exists():
             self._load()
         else:
-            self._index = faiss.IndexFlatIP(self._dim)
-            logger.info(f"Created new FAISS IndexFlatIP(dim={self._dim})")
+            self._migrate()
+        self._load_hnsw()
+        self._maybe_build_hnsw()
 
     def _load(self):
-        """Load FAISS index and metadata from disk."""
+        """Map the vector file and read the fixed-width records; texts stay on disk."""
+        saved_dtype = self._check_saved_layout()
+        try:
+            n = self._records_path.stat().st_size // _REC_DTYPE.itemsize
+            recs = np.fromfile(self._records_path, dtype=_REC_DTYPE, count=n)
+            # A crash mid-append can leave the last records without their blob
+            texts_size = self._texts_path.stat().st_size if self._texts_path.exists() else 0
+            ends = recs["blob_off"] + recs["text_len"] + recs["extra_len"]
+            complete = ends <= texts_size
+            if not complete.all():
+                n = int(np.argmin(complete))
+            self._texts_reader = open(self._texts_path, "rb")
+
+            if saved_dtype != self._dtype.name:
+                # Saved with the other vector_dtype: convert once
+                records = [(int(r["ctx_id"]), self._record_metadata(r)) for r in recs[:n]]
+                self._create_store(self._read_vector_file(n, saved_dtype), records)
+                logger.info(f"Converted {self._n} vectors to {self._dtype.name}")
+                return
+
+            self._vec_file = open(self._vectors_path, "r+b")
+            rows_on_disk = os.fstat(self._vec_file.fileno()).st_size // self._row_bytes
+            if rows_on_disk < n:
+                # Not something a crash leaves behind (rows are written first);
+                # refuse rather than cut records to fit
+                raise StoreMismatchError(
+                    f"{self._vectors_path} holds {rows_on_disk} rows but there are "
+                    f"{n} records"
+                )
+            self._map(max(rows_on_disk, _INITIAL_CAPACITY))
+            self._n = n
+            self._recs = np.empty(max(n, _INITIAL_CAPACITY), dtype=_REC_DTYPE)
+            self._recs[:n] = recs[:n]
+            self._next_id = int(recs["ctx_id"][:n].max()) + 1 if n else 0
+
+            # Cut anything past the last complete record
+            self._rec_file = open(self._records_path, "ab")
+            self._rec_file.truncate(n * _REC_DTYPE.itemsize)
+            self._texts_file = open(self._texts_path, "ab")
+            self._texts_file.truncate(int(ends[n - 1]) if n else 0)
+            # truncate() leaves the position at the old end, and blob offsets
+            # are taken from tell()
+            self._texts_file.seek(0, os.SEEK_END)
+            logger.info(f"Loaded {self._n} vectors from {self._storage_path}")
+        except StoreMismatchError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to load saved state: {e}. Creating new store.")
+            self._create_store(np.empty((0, self._dim), dtype=np.float32), [])
+
+    def _migrate(self):
+        """Import a store written by older versions, or create an empty one."""
         try:
-            self._index = faiss.read_index(str(self._faiss_path))
-            with open(self._meta_path, "rb") as f:
+            previous = self._read_previous_format()
+        except StoreMismatchError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to migrate saved state: {e}. Creating new store.")
+            previous = None
+        if previous is None:
+            self._create_store(np.empty((0, self._dim), dtype=np.float32), [])
+            logger.info(f"Created new vector store (dim={self._dim})")
+            return
+        vectors, records, source = previous
+        self._create_store(vectors, records)
+        logger.info(
+            f"Migrated {self._n} vectors from {source}; the old files can be deleted"
+        )
+
+    def _read_previous_format(self):
+        """Return (float32 vectors, records, source file) of an older store, or None."""
+        if self._jsonl_path.exists():
+            records = []
+            with open(self._jsonl_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn by a crash mid-append
+                    meta = orjson.loads(line)
+                    records.append((meta.pop("ctx_id"), meta))
+            vectors = self._read_vector_file(len(records))
+            return vectors, records[: len(vectors)], self._jsonl_path.name
+
+        if self._legacy_meta_path.exists() and (
+            self._legacy_vectors_path.exists() or self._legacy_faiss_path.exists()
+        ):
+            if self._legacy_vectors_path.exists():
+                vectors = np.load(self._legacy_vectors_path)
+            else:
+                vectors = self._read_legacy_faiss()
+            if vectors.ndim != 2 or vectors.shape[1] != self._dim:
+                raise self._dim_mismatch(vectors.shape[-1])
+            if vectors.dtype == np.int8:
+                vectors = vectors.astype(np.float32) / _I8_SCALE
+            with open(self._legacy_meta_path, "rb") as f:
                 saved = pickle.load(f)
-            self._metadata = saved["metadata"]
-            self._id_map = saved["id_map"]
-            self._next_id = saved["next_id"]
-            logger.info(
-                f"Loaded {self._index.ntotal} vectors from {self._faiss_path}"
-            )
+            records = [(cid, saved["metadata"].get(cid, {})) for cid in saved["id_map"]]
+            return np.asarray(vectors, dtype=np.float32), records, self._legacy_meta_path.name
+
+        return None
+
+    def _read_vector_file(self, n: int, dtype_name: Optional[str] = None) -> np.ndarray:
+        """Read up to n rows as float32 from the vector file of dtype_name.
+
+        Without a dtype, whichever vector file exists is read, and its rows
+        are checked to have the configured dimension.
+        """
+        if dtype_name is None:
+            dtype_name = self._saved_vector_dtype()
+            if not self._rows_are_unit(dtype_name, n):
+                raise self._dim_mismatch("a different")
+        path = self._storage_path / _VECTOR_FILES[dtype_name]
+        rows = np.fromfile(path, dtype=dtype_name, count=n * self._dim)
+        rows = rows[: len(rows) - len(rows) % self._dim].reshape(-1, self._dim)
+        if rows.dtype == np.int8:
+            return rows.astype(np.float32) / _I8_SCALE
+        return rows
+
+    def _saved_vector_dtype(self) -> str:
+        """The dtype of the vector file on disk, preferring the configured one."""
+        if self._vectors_path.exists():
+            return self._dtype.name
+        for name, filename in _VECTOR_FILES.items():
+            if (self._storage_path / filename).exists():
+                return name
+        raise FileNotFoundError(f"no vector file in {self._storage_path}")
+
+    def _check_saved_layout(self) -> str:
+        """Return the dtype of the saved vectors once their dimension checks out.
+
+        Stores saved before store.json existed are checked by sampling rows,
+        which are stored unit length and aren't when read with a wrong width.
+        Raises StoreMismatchError instead of misreading the store.
+        """
+        if self._info_path.exists():
+            info = orjson.loads(self._info_path.read_bytes())
+            if info["dim"] != self._dim:
+                raise self._dim_mismatch(info["dim"])
+            return info["vector_dtype"]
+        try:
+            dtype_name = self._saved_vector_dtype()
+        except FileNotFoundError:
+            return self._dtype.name  # nothing to misread
+        n = self._records_path.stat().st_size // _REC_DTYPE.itemsize
+        if not self._rows_are_unit(dtype_name, n):
+            raise self._dim_mismatch("a different")
+        self._write_store_info(dtype_name)
+        return dtype_name
+
+    def _rows_are_unit(self, dtype_name: str, n: int, sample: int = 16) -> bool:
+        """Whether the first stored rows, read at the configured dim, are unit length."""
+        path = self._storage_path / _VECTOR_FILES[dtype_name]
+        rows = np.fromfile(path, dtype=dtype_name, count=min(n, sample) * self._dim)
+        k = len(rows) // self._dim
+        rows = rows[: k * self._dim].reshape(k, self._dim)
+        norms = np.linalg.norm(rows.astype(np.float32), axis=1)
+        if dtype_name == "int8":
+            norms /= _I8_SCALE
+        # Zero rows carry no information either way
+        norms = norms[norms > 0]
+        return bool(np.all(np.abs(norms - 1.0) < 0.1))
+
+    def _dim_mismatch(self, saved_dim) -> StoreMismatchError:
+        return StoreMismatchError(
+            f"{self._storage_path} holds {saved_dim}-dim vectors but the embedding "
+            f"model produces {self._dim}-dim ones; switch back to the previous "
+            "model or set MEMORY_STORAGE_PATH to a new directory"
+        )
+
+    def _write_store_info(self, dtype_name: str):
+        tmp = self._info_path.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps({"dim": self._dim, "vector_dtype": dtype_name}))
+        os.replace(tmp, self._info_path)
+
+    def _read_legacy_faiss(self) -> np.ndarray:
+        """Read all vectors from a flat FAISS index saved by older versions."""
+        if faiss is None:
+            raise RuntimeError("faiss is required to migrate faiss_index.bin")
+        index = faiss.read_index(str(self._legacy_faiss_path))
+        logger.info(f"Migrating {index.ntotal} vectors from {self._legacy_faiss_path}")
+        return index.reconstruct_n(0, index.ntotal)
+
+    def _create_store(self, vectors: np.ndarray, records: List[Tuple[int, Dict[str, Any]]]):
+        """Write fresh store files holding the given float32 rows and records."""
+        # Unmap before the vector file is truncated underneath the mapping
+        self._mm = self._xb = None
+        for f in (self._vec_file, self._rec_file, self._texts_file, self._texts_reader):
+            if f is not None:
+                f.close()
+        self._vec_file = open(self._vectors_path, "w+b")
+        self._map(_INITIAL_CAPACITY)
+        self._n = 0
+        self._append_rows(vectors)
+        self._rec_file = open(self._records_path, "wb")
+        self._texts_file = open(self._texts_path, "wb")
+        self._recs = np.empty(max(len(records), _INITIAL_CAPACITY), dtype=_REC_DTYPE)
+        for pos, (ctx_id, metadata) in enumerate(records):
+            self._write_record(pos, ctx_id, metadata)
+        self._next_id = max((ctx_id for ctx_id, _ in records), default=-1) + 1
+        self.save()
+        self._texts_reader = open(self._texts_path, "rb")
+        self._write_store_info(self._dtype.name)
+        # A vector file left from the other vector_dtype is now stale; loading
+        # it after switching back would pair old rows with the new records
+        for filename in _VECTOR_FILES.values():
+            path = self._storage_path / filename
+            if path != self._vectors_path and path.exists():
+                path.unlink()
+
+    def _write_record(self, pos: int, ctx_id: int, metadata: Dict[str, Any]):
+        """Append a record's blob and fixed-width entry. Caller holds the lock."""
+        extra = dict(metadata)
+        text = extra.pop("text", "").encode("utf-8", "surrogatepass")
+        role = extra.pop("role", "").encode("utf-8")[:16]
+        model = extra.pop("model", "").encode("utf-8")[:64]
+        timestamp = extra.pop("timestamp", 0.0)
+        extra_json = orjson.dumps(extra) if extra else b""
+
+        blob_off = self._texts_file.tell()
+        self._texts_file.write(text)
+        self._texts_file.write(extra_json)
+        rec = (ctx_id, timestamp, role, model, blob_off, len(text), len(extra_json))
+        self._rec_file.write(_REC.pack(*rec))
+
+        if pos >= len(self._recs):
+            grown = np.empty(len(self._recs) * 2, dtype=_REC_DTYPE)
+            grown[:pos] = self._recs[:pos]
+            self._recs = grown
+        self._recs[pos] = rec
+
+    def _record_metadata(self, rec) -> Dict[str, Any]:
+        """Rebuild a record's metadata dict, reading its text from disk."""
+        text_len = int(rec["text_len"])
+        with self._read_lock:
+            self._texts_reader.seek(int(rec["blob_off"]))
+            blob = self._texts_reader.read(text_len + int(rec["extra_len"]))
+        metadata = {
+            "text": blob[:text_len].decode("utf-8", "surrogatepass"),
+            "role": rec["role"].decode("utf-8", "ignore"),
+            "model": rec["model"].decode("utf-8", "ignore"),
+            "timestamp": float(rec["timestamp"]),
+        }
+        if len(blob) > text_len:
+            metadata.update(orjson.loads(blob[text_len:]))
+        return metadata
+
+    def _map(self, capacity: int):
+        """(Re)map the vector file with room for capacity rows."""
+        if self._mm is not None:
+            self._mm.flush()
+            # Release the old mapping first; Windows can't resize a mapped file
+            self._mm = self._xb = None
+        os.ftruncate(self._vec_file.fileno(), capacity * self._row_bytes)
+        self._mm = np.memmap(
+            self._vec_file, dtype=self._dtype, mode="r+", shape=(capacity, self._dim)
+        )
+        # Plain ndarray view so NumPy/Numba kernels see a regular array
+        self._xb = self._mm.view(np.ndarray)
+
+    def _append_rows(self, rows: np.ndarray):
+        """Append float32 rows to the matrix, doubling capacity when full.
+
+        Rows are quantized when the store is int8. Caller holds the lock.
+        """
+        if self._dtype == np.int8:
+            rows = _quantize(rows)
+        needed = self._n + len(rows)
+        if needed > len(self._xb):
+            capacity = len(self._xb)
+            while capacity < needed:
+                capacity *= 2
+            self._map(capacity)
+        self._xb[self._n:needed] = rows
+        self._n = needed
+
+    def _wants_hnsw(self) -> bool:
+        index_type = self._config.index_type
+        if index_type == "hnsw":
+            return True
+        return index_type == "auto" and self._n >= self._config.hnsw_threshold
+
+    def _maybe_build_hnsw(self):
+        """Start the background HNSW build if the config calls for one."""
+        with self._lock:
+            if self._hnsw is not None or self._hnsw_building or not self._wants_hnsw():
+                return
+            if faiss is None:
+                logger.warning("faiss not installed; keeping flat search")
+                self._hnsw_building = True  # don't warn on every insert
+                return
+            self._hnsw_building = True
+        threading.Thread(
+            target=self._build_hnsw, name="hnsw-build", daemon=True
+        ).start()
+
+    def _load_hnsw(self):
+        """Load the saved HNSW graph and add any rows stored after it was saved."""
+        if not self._hnsw_path.exists() or faiss is None or not self._wants_hnsw():
+            return
+        try:
+            index = faiss.read_index(str(self._hnsw_path))
         except Exception as e:
-            logger.warning(f"Failed to load saved state: {e}. Creating new index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._metadata = {}
-            self._id_map = []
-            self._next_id = 0
+            logger.warning(f"Failed to load {self._hnsw_path}: {e}. Rebuilding.")
+            return
+        if index.d != self._dim or index.ntotal > self._n:
+            # Stale: written for a different model, or before records were lost
+            logger.warning(f"Discarding stale {self._hnsw_path}")
+            self._hnsw_path.unlink()
+            return
+        self._hnsw_saved = index.ntotal
+        if index.ntotal < self._n:
+            index.add(self._rows_f32(index.ntotal, self._n))
+        index.hnsw.efSearch = _HNSW_EF_SEARCH
+        self._hnsw = index
+        logger.info(f"Loaded HNSW index ({index.ntotal} vectors)")
+
+    def _write_hnsw(self, index):
+        """Write the graph next to the store, replacing the old one atomically."""
+        tmp = self._hnsw_path.with_suffix(".tmp")
+        faiss.write_index(index, str(tmp))
+        os.replace(tmp, self._hnsw_path)
+        self._hnsw_saved = index.ntotal
+
+    def _build_hnsw(self):
+        """Build an HNSW index from the matrix, then catch up and publish it."""
+        with self._lock:
+            n = self._n
+            snapshot = self._rows_f32(0, n)
+        logger.info(f"Building HNSW index over {n} vectors")
+        index = faiss.IndexHNSWFlat(self._dim, _HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = _HNSW_EF_SEARCH
+        if n:
+            index.add(snapshot)
+        # Not shared yet, so this needs no lock; newer rows are added on load
+        self._write_hnsw(index)
+        with self._lock:
+            # Rows stored while the graph was being built
+            if self._n > n:
+                index.add(self._rows_f32(n, self._n))
+            self._hnsw = index
+            self._hnsw_building = False
+        logger.info(f"HNSW index ready ({index.ntotal} vectors)")
 
     def store_message(
         self,
@@ -71,14 +568,13 @@ class MemoryManager:
         role: str,
         model: str = "",
         extra_metadata: Optional[Dict[str, Any]] = None,
+        normalized: bool = False,
     ) -> int:
-        """Store a conversation message in memory."""
-        # Ensure 2D, float32, L2-normalized
-        vec = embedding.astype(np.float32).reshape(1, -1)
-        norm = np.linalg.norm(vec)
-        if norm > 0:
-            vec = vec / norm
+        """Store a conversation message in memory.
 
+        Pass normalized=True for embeddings that are already unit length
+        (as Embedder output is) to skip renormalizing them.
+        """
         metadata = {
             "text": text,
             "role": role,
@@ -89,12 +585,18 @@ class MemoryManager:
             metadata.update(extra_metadata)
 
         with self._lock:
+            vec = self._normalized(embedding, normalized)
             ctx_id = self._next_id
             self._next_id += 1
-            self._index.add(vec)
-            self._id_map.append(ctx_id)
-            self._metadata[ctx_id] = metadata
+            self._append_rows(vec)
+            if self._hnsw is not None:
+                self._hnsw.add(vec)
+            self._write_record(self._n - 1, ctx_id, metadata)
+            self._texts_file.flush()
+            self._rec_file.flush()
 
+        if self._hnsw is None and not self._hnsw_building:
+            self._maybe_build_hnsw()
         return ctx_id
 
     def search_relevant(
@@ -102,60 +604,206 @@ class MemoryManager:
         query_embedding: np.ndarray,
         top_k: int = 5,
         similarity_threshold: float = 0.3,
+        normalized: bool = False,
     ) -> List[Dict[str, Any]]:
-        """Search for relevant past conversations above the similarity threshold."""
-        if self._index.ntotal == 0:
+        """Search for relevant past conversations above the similarity threshold.
+
+        Scores are plain inner products, so the query is L2-normalized first
+        unless normalized=True says it already is.
+        """
+        if self._n == 0:
             return []
 
-        # Ensure 2D, float32, L2-normalized
-        vec = query_embedding.astype(np.float32).reshape(1, -1)
-        norm = np.linalg.norm(vec)
+        with self._lock:
+            vec = self._normalized(query_embedding, normalized)
+            n = self._n
+            k = min(top_k, n)
+            if self._hnsw is not None:
+                scores, top = self._hnsw.search(vec, k)
+                scores, top = scores[0], top[0]
+            else:
+                scores, top = self._flat_search(vec[0], n, k, similarity_threshold)
+
+        return self._collect_results(scores, top, similarity_threshold)
+
+    def _normalized(
+        self, embedding: np.ndarray, normalized: bool = False
+    ) -> np.ndarray:
+        """L2-normalize embedding into the shared (1, dim) float32 buffer.
+
+        Avoids per-call temporaries; the result is only valid while the
+        caller holds the lock. An already normalized embedding is only copied.
+        """
+        buf = self._vbuf
+        np.copyto(buf[0], embedding.reshape(-1), casting="unsafe")
+        if normalized:
+            return buf
+        norm = np.linalg.norm(buf)
         if norm > 0:
-            vec = vec / norm
+            buf /= norm
+        return buf
+
+    def search_relevant_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        similarity_threshold: float = 0.3,
+        normalized: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """search_relevant for several queries at once, sharing one matrix pass."""
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self._dim)
+        if self._n == 0:
+            return [[] for _ in range(len(queries))]
 
-        k = min(top_k, self._index.ntotal)
+        if not normalized:
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms > 0, norms, 1.0)
 
         with self._lock:
-            scores, indices = self._index.search(vec, k)
+            n = self._n
+            k = min(top_k, n)
+            if self._hnsw is not None:
+                batch = zip(*self._hnsw.search(queries, k))
+            else:
+                all_scores = self._flat_scores_batch(queries, n)
+                batch = [
+                    self._select_topk(row, k, similarity_threshold)
+                    for row in all_scores
+                ]
+
+        return [
+            self._collect_results(scores, top, similarity_threshold)
+            for scores, top in batch
+        ]
 
+    def _collect_results(
+        self, scores: np.ndarray, top: np.ndarray, similarity_threshold: float
+    ) -> List[Dict[str, Any]]:
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < 0 or idx >= len(self._id_map):
+        for score, idx in zip(scores, top):
+            if idx < 0 or idx >= self._n:
                 continue
-            ctx_id = self._id_map[idx]
-            meta = self._metadata.get(ctx_id, {})
             if score >= similarity_threshold:
+                rec = self._recs[idx]
                 results.append({
-                    "ctx_id": ctx_id,
+                    "ctx_id": int(rec["ctx_id"]),
                     "similarity": float(score),
-                    "metadata": meta,
+                    "metadata": self._record_metadata(rec),
                 })
 
         return results
 
+    def _flat_search(self, vec: np.ndarray, n: int, k: int, threshold: float):
+        """Exact top-k by inner product over the first n rows, best first."""
+        return self._select_topk(self._flat_scores(vec, n), k, threshold)
+
+    @staticmethod
+    def _select_topk(all_scores: np.ndarray, k: int, threshold: float):
+        """Top-k (scores, indices) of a score vector, best first."""
+        if _topk is not None:
+            return _topk(all_scores, k, threshold)
+        n = len(all_scores)
+        if k < n:
+            top = np.argpartition(-all_scores, k - 1)[:k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-all_scores[top])]
+        return all_scores[top], top
+
+    def _flat_scores(self, vec: np.ndarray, n: int) -> np.ndarray:
+        """Inner products of the first n rows with the unit query vector."""
+        if self._dtype == np.int8:
+            q = _quantize(vec)
+            # SimSIMD's int8 kernel beats even the parallel Numba loop
+            if simsimd is not None:
+                return _simsimd_scores(q[None, :], self._xb[:n])[0] * _I8_INV_SCALE2
+            if _scores_i8 is not None:
+                return _scores_i8(self._xb, n, q)
+            # NumPy has no int8 GEMM; widen a block at a time (exact in float32)
+            qf = q.astype(np.float32) * _I8_INV_SCALE2
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, _I8_BLOCK):
+                stop = min(start + _I8_BLOCK, n)
+                scores[start:stop] = self._xb[start:stop].astype(np.float32) @ qf
+            return scores
+        if _scores_f32 is not None:
+            return _scores_f32(self._xb, n, vec)
+        if simsimd is not None:
+            return _simsimd_scores(vec[None, :], self._xb[:n])[0]
+        return self._xb[:n] @ vec
+
+    def _flat_scores_batch(self, queries: np.ndarray, n: int) -> np.ndarray:
+        """(len(queries), n) inner products, one BLAS GEMM over the matrix."""
+        if self._dtype == np.int8:
+            if simsimd is not None:
+                return _simsimd_scores(_quantize(queries), self._xb[:n]) * _I8_INV_SCALE2
+            qf = _quantize(queries).astype(np.float32) * _I8_INV_SCALE2
+            scores = np.empty((len(queries), n), dtype=np.float32)
+            for start in range(0, n, _I8_BLOCK):
+                stop = min(start + _I8_BLOCK, n)
+                scores[:, start:stop] = qf @ self._xb[start:stop].astype(np.float32).T
+            return scores
+        return queries @ self._xb[:n].T
+
+    def _rows_f32(self, start: int, stop: int) -> np.ndarray:
+        """Rows [start, stop) as float32, dequantizing int8 storage."""
+        rows = self._xb[start:stop]
+        if rows.dtype == np.int8:
+            return rows.astype(np.float32) / _I8_SCALE
+        return rows.copy()
+
+    def warmup(self):
+        """Compile the Numba search kernels so the first request doesn't pay for it."""
+        if _topk is None:
+            return
+        xb = np.zeros((1, self._dim), dtype=self._dtype)
+        q = np.zeros(self._dim, dtype=np.float32)
+        if xb.dtype == np.int8:
+            scores = _scores_i8(xb, 1, _quantize(q))
+        else:
+            scores = _scores_f32(xb, 1, q)
+        _topk(scores, 1, 0.0)
+
+    def get_metadata(self, ctx_id: int) -> Optional[Dict[str, Any]]:
+        """Return the metadata stored under ctx_id, or None if there is none."""
+        with self._lock:
+            # ctx_ids are assigned in append order, so the records are sorted
+            ids = self._recs["ctx_id"][: self._n]
+            pos = int(np.searchsorted(ids, ctx_id))
+            if pos == len(ids) or ids[pos] != ctx_id:
+                return None
+            rec = self._recs[pos]
+        return self._record_metadata(rec)
+
     @property
     def count(self) -> int:
-        return self._index.ntotal
+        return self._n
+
+    def save(self, include_index: bool = False):
+        """Flush appended vectors and metadata to stable storage.
 
-    def save(self):
-        """Persist FAISS index and metadata to disk."""
+        Records are written as they are stored, so this only syncs; it does
+        not rewrite anything. With include_index, the HNSW graph is also
+        rewritten if it gained vectors since it was last saved (done at
+        shutdown; rows missing from the saved graph are re-added on load).
+        """
         with self._lock:
-            faiss.write_index(self._index, str(self._faiss_path))
-            with open(self._meta_path, "wb") as f:
-                pickle.dump(
-                    {
-                        "metadata": self._metadata,
-                        "id_map": self._id_map,
-                        "next_id": self._next_id,
-                    },
-                    f,
-                )
-        logger.info(f"Saved {self._index.ntotal} vectors to {self._faiss_path}")
+            self._mm.flush()
+            for f in (self._texts_file, self._rec_file):
+                f.flush()
+                os.fsync(f.fileno())
+            if include_index and self._hnsw is not None:
+                if self._hnsw.ntotal != self._hnsw_saved:
+                    self._write_hnsw(self._hnsw)
+        logger.debug(f"Flushed {self._n} vectors to {self._storage_path}")
 
     def stats(self) -> Dict[str, Any]:
         return {
-            "num_contexts": self._index.ntotal,
+            "num_contexts": self._n,
             "dim": self._dim,
-            "faiss_index_type": "IndexFlatIP",
+            "index_type": "hnsw" if self._hnsw is not None else "flat",
+            "vector_dtype": self._dtype.name,
+            "capacity": len(self._xb),
             "storage_path": str(self._storage_path),
         }
+
@@ -1,52 +1,126 @@
+import re
 import json
 import asyncio
 import logging
-from typing import Optional
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set
 
-import httpx
+import aiohttp
+import orjson
 from fastapi import FastAPI, Request, Response
 from fastapi.responses import StreamingResponse
 
+from batching import MicroBatcher
 from config import ProxyConfig
-from embedder import Embedder
+from embedder import Embedder, create_embedder
 from memory_manager import MemoryManager
 from context_injection import build_memory_block, inject_context_into_messages, inject_context_into_system
 
+try:
+    import ahocorasick  # pyahocorasick: optional single-pass phrase matcher
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
 config: ProxyConfig = None
 embedder: Embedder = None
 memory: MemoryManager = None
-http_client: httpx.AsyncClient = None
+search_batcher: Optional[MicroBatcher] = None
+store_batcher: Optional[MicroBatcher] = None
+http_client: aiohttp.ClientSession = None
+# Bounds background stores; memory_dirty wakes the periodic save task
+store_semaphore: asyncio.Semaphore = None
+memory_dirty: asyncio.Event = None
+save_task: asyncio.Task = None
+# Strong references to running store tasks; the event loop only keeps weak
+# ones, so an unreferenced task can be garbage collected mid-store
+store_tasks: Set[asyncio.Task] = set()
+# Query embedding (with the search that follows it) gets its own threads so
+# it never queues behind background stores, which embed on store_pool, or
+# saves, which run on a single I/O thread
+embed_pool: ThreadPoolExecutor = None
+store_pool: ThreadPoolExecutor = None
+io_pool: ThreadPoolExecutor = None
 
 app = FastAPI(title="Ollama Memory Proxy")
 
 
 @app.on_event("startup")
 async def startup():
-    global config, embedder, memory, http_client
+    global config, embedder, memory, search_batcher, store_batcher, http_client
+    global store_semaphore, memory_dirty, save_task
+    global embed_pool, store_pool, io_pool
     config = ProxyConfig.from_env()
+    embed_pool = ThreadPoolExecutor(config.embedding_workers, thread_name_prefix="embed")
+    store_pool = ThreadPoolExecutor(
+        max(1, config.store_concurrency), thread_name_prefix="embed-store"
+    )
+    io_pool = ThreadPoolExecutor(1, thread_name_prefix="memory-io")
 
     logger.info("Loading embedding model (first time may download ~80MB)...")
-    embedder = Embedder(config)
+    embedder = create_embedder(config)
+    # The Ollama backend reports the dimension of whatever model it serves
+    config.embedding_dim = embedder.dim
     # Warmup to ensure model is fully loaded
     embedder.embed("warmup")
-    logger.info(f"Embedding model '{config.embedding_model}' loaded on {config.embedding_device}")
+    logger.info(
+        f"Embedding model '{config.embedding_model}' loaded on {embedder.device} "
+        f"({config.embedding_backend})"
+    )
 
     memory = MemoryManager(config)
+    memory.warmup()
     logger.info(f"Memory initialized: {memory.count} stored contexts")
+    if config.search_batch_window_ms > 0:
+        search_batcher = MicroBatcher(
+            lambda queries: memory.search_relevant_batch(
+                queries, config.search_top_k, config.similarity_threshold,
+                normalized=True,
+            ),
+            config.search_batch_window_ms,
+            config.search_batch_max,
+        )
+    if config.embed_batch_window_ms > 0:
+        store_batcher = MicroBatcher(
+            _embed_and_store_batch,
+            config.embed_batch_window_ms,
+            config.embed_batch_max,
+            executor=store_pool,
+        )
+    store_semaphore = asyncio.Semaphore(config.store_concurrency)
+    memory_dirty = asyncio.Event()
+    save_task = asyncio.create_task(_periodic_save())
 
-    http_client = httpx.AsyncClient(
+    # Ollama speaks plain HTTP/1.1, so concurrency comes from a large
+    # keep-alive pool rather than HTTP/2 multiplexing
+    http_client = aiohttp.ClientSession(
         base_url=config.ollama_base_url,
-        timeout=httpx.Timeout(connect=10.0, read=300.0, write=10.0, pool=10.0),
+        connector=aiohttp.TCPConnector(
+            limit=config.upstream_max_connections,
+            limit_per_host=config.upstream_max_connections,
+            keepalive_timeout=config.upstream_keepalive_s,
+        ),
+        timeout=aiohttp.ClientTimeout(total=None, connect=10.0, sock_read=300.0),
+        # Lets large bodies arrive in fewer, bigger reads; streamed tokens are
+        # still handed over as soon as they arrive
+        read_bufsize=1 << 20,
     )
     logger.info(f"Proxy ready: :{config.proxy_port} -> {config.ollama_base_url}")
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    memory.save()
-    await http_client.aclose()
+    save_task.cancel()
+    # Let conversations still being embedded reach the store before saving
+    if store_tasks:
+        await asyncio.gather(*store_tasks, return_exceptions=True)
+    memory.save(include_index=True)
+    embed_pool.shutdown(wait=False)
+    store_pool.shutdown(wait=False)
+    io_pool.shutdown(wait=False)
+    await http_client.close()
     logger.info("Proxy shut down. Memory saved.")
 
 
@@ -59,8 +133,8 @@ async def chat(request: Request):
     # Robust JSON parsing: handle encoding issues from various clients
     raw_body = await request.body()
     try:
-        body = json.loads(raw_body)
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        body = orjson.loads(raw_body)
+    except orjson.JSONDecodeError as e:
         logger.warning(f"JSON parse failed ({e}), trying with utf-8 replace...")
         try:
             body = json.loads(raw_body.decode("utf-8", errors="replace"))
@@ -78,15 +152,9 @@ async def chat(request: Request):
 
     # Step 2: Generate embedding and search memory
     results = []
-    if user_text and memory.count > 0:
+    if _should_search(user_text):
         try:
-            query_embedding = await asyncio.to_thread(embedder.embed, user_text)
-            results = await asyncio.to_thread(
-                memory.search_relevant,
-                query_embedding,
-                config.search_top_k,
-                config.similarity_threshold,
-            )
+            results = await _search_memory(user_text)
             if results:
                 logger.info(
                     f"Memory: {len(results)} results found "
@@ -95,12 +163,18 @@ async def chat(request: Request):
         except Exception as e:
             logger.error(f"Memory search failed: {e}")
 
-    # Step 3: Inject memory context (always when memory has data)
+    # Step 3: Replay the stored reply if this question was asked before
+    cached_reply = _cached_reply(results, body, model_name)
+    if cached_reply is not None:
+        logger.info(f"Memory: answered from cache (sim: {results[0]['similarity']:.3f})")
+        return _cached_chat_response(cached_reply, model_name, stream)
+
+    # Step 4: Inject memory context (always when memory has data)
     context_block = build_memory_block(results, config, memory.count)
     if context_block:
         body["messages"] = inject_context_into_messages(messages, context_block)
 
-    # Step 4: Forward to Ollama
+    # Step 5: Forward to Ollama
     if stream:
         return await _stream_chat(body, user_text, model_name)
     else:
@@ -109,28 +183,29 @@ async def chat(request: Request):
 
 async def _stream_chat(body: dict, user_text: str, model_name: str):
     """Handle streaming /api/chat with NDJSON passthrough."""
-    collected_response = []
-
     async def generate():
-        async with http_client.stream("POST", "/api/chat", json=body) as response:
-            async for line in response.aiter_lines():
-                if not line.strip():
+        # Raw UTF-8, decoded once at the end; UTF-8 needs at most 4 bytes
+        # per char, so this always covers max_stored_chars
+        collected = bytearray()
+        room = 4 * config.max_stored_chars
+        async with http_client.post(
+            "/api/chat", data=_encode_body(body), headers=_JSON_HEADERS
+        ) as response:
+            async for line in _iter_lines(response):
+                if line.isspace():
                     continue
-                yield line + "\n"
+                yield line
 
-                try:
-                    chunk = json.loads(line)
-                    content = chunk.get("message", {}).get("content", "")
+                if room > 0:
+                    content = _scan_content(_CHAT_CONTENT_KEY, _CHAT_CONTENT_RE, line)
                     if content:
-                        collected_response.append(content)
-                except json.JSONDecodeError:
-                    pass
+                        collected += content[:room]
+                        room -= len(content)
 
         # Store in memory after stream completes
-        assistant_text = "".join(collected_response)
-        asyncio.create_task(
-            _store_conversation(user_text, assistant_text, model_name)
-        )
+        assistant_text = collected.decode("utf-8", errors="replace")
+        assistant_text = assistant_text[: config.max_stored_chars]
+        _spawn_store(user_text, assistant_text, model_name)
 
     return StreamingResponse(
         generate(),
@@ -141,21 +216,87 @@ async def _stream_chat(body: dict, user_text: str, model_name: str):
 
 async def _non_stream_chat(body: dict, user_text: str, model_name: str):
     """Handle non-streaming /api/chat."""
-    response = await http_client.post("/api/chat", json=body)
-    data = response.json()
-
-    assistant_text = data.get("message", {}).get("content", "")
-    asyncio.create_task(
-        _store_conversation(user_text, assistant_text, model_name)
-    )
+    async with http_client.post(
+        "/api/chat", data=_encode_body(body), headers=_JSON_HEADERS
+    ) as response:
+        content = await response.read()
+    # Sliced out like the streamed frames; the body is forwarded unparsed
+    assistant_text = _scan_content(_CHAT_CONTENT_KEY, _CHAT_CONTENT_RE, content)
+    assistant_text = assistant_text.decode("utf-8", errors="replace")
+    assistant_text = assistant_text[: config.max_stored_chars]
+    _spawn_store(user_text, assistant_text, model_name)
 
     return Response(
-        content=response.content,
-        status_code=response.status_code,
+        content=content,
+        status_code=response.status,
         media_type="application/json",
     )
 
 
+# Request fields that shape the reply beyond the question itself
+_REPLY_SHAPING_FIELDS = ("format", "tools", "options", "think")
+
+
+def _cached_reply(results: list, body: dict, model_name: str) -> Optional[str]:
+    """Return the stored reply to a near-identical earlier question, if any.
+
+    Only plain chats of a single user text message qualify (no system
+    prompt, images, output format, tools, options or thinking), since
+    otherwise the reply depends on more than the question.
+    """
+    if config.cache_hit_threshold <= 0 or not results:
+        return None
+    top = results[0]
+    meta = top["metadata"]
+    if (
+        top["similarity"] < config.cache_hit_threshold
+        or meta.get("role") != "user"
+        or meta.get("model") != model_name
+        or "reply_id" not in meta
+    ):
+        return None
+    messages = body.get("messages", [])
+    if (
+        len(messages) != 1
+        or messages[0].get("role") != "user"
+        or messages[0].get("images")
+        or any(body.get(field) is not None for field in _REPLY_SHAPING_FIELDS)
+    ):
+        return None
+
+    reply = memory.get_metadata(meta["reply_id"])
+    # A reply cut to max_stored_chars when stored can't be replayed
+    if reply is None or len(reply["text"]) >= config.max_stored_chars:
+        return None
+    return reply["text"]
+
+
+def _cached_chat_response(text: str, model_name: str, stream: bool):
+    """Return a cached reply in Ollama's /api/chat response format."""
+    created_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    message = {"role": "assistant", "content": text}
+    final = {
+        "model": model_name,
+        "created_at": created_at,
+        "message": message,
+        "done": True,
+        "done_reason": "stop",
+    }
+    if not stream:
+        return Response(content=orjson.dumps(final), media_type="application/json")
+
+    # Same framing as Ollama: the content, then an empty done frame
+    frames = [
+        {"model": model_name, "created_at": created_at, "message": message, "done": False},
+        {**final, "message": {"role": "assistant", "content": ""}},
+    ]
+    return StreamingResponse(
+        iter([orjson.dumps(frame, option=orjson.OPT_APPEND_NEWLINE) for frame in frames]),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 # ==================================================================
 # /api/generate -- Intercepted endpoint (used by `ollama run` CLI)
 # ==================================================================
@@ -165,8 +306,8 @@ async def generate(request: Request):
     """Intercept /api/generate (used by `ollama run`) with memory augmentation."""
     raw_body = await request.body()
     try:
-        body = json.loads(raw_body)
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        body = orjson.loads(raw_body)
+    except orjson.JSONDecodeError as e:
         logger.warning(f"JSON parse failed on /api/generate ({e}), trying utf-8 replace...")
         try:
             body = json.loads(raw_body.decode("utf-8", errors="replace"))
@@ -181,15 +322,9 @@ async def generate(request: Request):
 
     # Search memory and inject context into system prompt
     results = []
-    if prompt and memory.count > 0:
+    if _should_search(prompt):
         try:
-            query_embedding = await asyncio.to_thread(embedder.embed, prompt)
-            results = await asyncio.to_thread(
-                memory.search_relevant,
-                query_embedding,
-                config.search_top_k,
-                config.similarity_threshold,
-            )
+            results = await _search_memory(prompt)
             if results:
                 logger.info(
                     f"Memory(/api/generate): {len(results)} results found "
@@ -212,28 +347,29 @@ async def generate(request: Request):
 
 async def _stream_generate(body: dict, user_text: str, model_name: str):
     """Handle streaming /api/generate with NDJSON passthrough."""
-    collected_response = []
-
     async def gen():
-        async with http_client.stream("POST", "/api/generate", json=body) as response:
-            async for line in response.aiter_lines():
-                if not line.strip():
+        # Raw UTF-8, decoded once at the end; UTF-8 needs at most 4 bytes
+        # per char, so this always covers max_stored_chars
+        collected = bytearray()
+        room = 4 * config.max_stored_chars
+        async with http_client.post(
+            "/api/generate", data=_encode_body(body), headers=_JSON_HEADERS
+        ) as response:
+            async for line in _iter_lines(response):
+                if line.isspace():
                     continue
-                yield line + "\n"
+                yield line
 
-                try:
-                    chunk = json.loads(line)
-                    content = chunk.get("response", "")
+                if room > 0:
+                    content = _scan_content(_GENERATE_CONTENT_KEY, _GENERATE_CONTENT_RE, line)
                     if content:
-                        collected_response.append(content)
-                except json.JSONDecodeError:
-                    pass
+                        collected += content[:room]
+                        room -= len(content)
 
         # Store in memory after stream completes
-        assistant_text = "".join(collected_response)
-        asyncio.create_task(
-            _store_conversation(user_text, assistant_text, model_name)
-        )
+        assistant_text = collected.decode("utf-8", errors="replace")
+        assistant_text = assistant_text[: config.max_stored_chars]
+        _spawn_store(user_text, assistant_text, model_name)
 
     return StreamingResponse(
         gen(),
@@ -244,47 +380,87 @@ async def _stream_generate(body: dict, user_text: str, model_name: str):
 
 async def _non_stream_generate(body: dict, user_text: str, model_name: str):
     """Handle non-streaming /api/generate."""
-    response = await http_client.post("/api/generate", json=body)
-    data = response.json()
-
-    assistant_text = data.get("response", "")
-    asyncio.create_task(
-        _store_conversation(user_text, assistant_text, model_name)
-    )
+    async with http_client.post(
+        "/api/generate", data=_encode_body(body), headers=_JSON_HEADERS
+    ) as response:
+        content = await response.read()
+    assistant_text = _scan_content(_GENERATE_CONTENT_KEY, _GENERATE_CONTENT_RE, content)
+    assistant_text = assistant_text.decode("utf-8", errors="replace")
+    assistant_text = assistant_text[: config.max_stored_chars]
+    _spawn_store(user_text, assistant_text, model_name)
 
     return Response(
-        content=response.content,
-        status_code=response.status_code,
+        content=content,
+        status_code=response.status,
         media_type="application/json",
     )
 
 
+def _should_search(text: Optional[str]) -> bool:
+    """Whether a query is worth an embedding pass: long enough, and enough memories."""
+    return (
+        bool(text)
+        and len(text) >= config.min_query_chars
+        and memory.count >= max(1, config.min_memories_for_search)
+    )
+
+
+async def _search_memory(text: str) -> list:
+    """Embed a query and search memory for it.
+
+    Both steps run in one thread hop, unless batching is enabled, in which
+    case the search is coalesced with concurrent ones.
+    """
+    if search_batcher is not None:
+        query_embedding = await _run_in(embed_pool, embedder.embed, text)
+        return await search_batcher.submit(query_embedding)
+    return await _run_in(embed_pool, _embed_and_search, text)
+
+
+def _embed_and_search(text: str) -> list:
+    # Embedder output is already unit length, so memory skips normalizing it
+    return memory.search_relevant(
+        embedder.embed(text), config.search_top_k, config.similarity_threshold,
+        normalized=True,
+    )
+
+
+async def _run_in(pool: ThreadPoolExecutor, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def _spawn_store(user_text: str, assistant_text: str, model_name: str):
+    """Store a conversation in the background, keeping the task referenced."""
+    task = asyncio.create_task(
+        _store_conversation(user_text, assistant_text, model_name)
+    )
+    store_tasks.add(task)
+    task.add_done_callback(store_tasks.discard)
+
+
 async def _store_conversation(
     user_text: str, assistant_text: str, model_name: str
 ):
     """Store user and assistant messages in memory (background task)."""
-    try:
-        if user_text and len(user_text) > 5:
-            user_emb = await asyncio.to_thread(embedder.embed, user_text)
-            await asyncio.to_thread(
-                memory.store_message, user_emb, user_text, "user", model_name
-            )
-
-        if assistant_text and len(assistant_text) > 20 and not _is_unhelpful(assistant_text):
-            asst_emb = await asyncio.to_thread(embedder.embed, assistant_text)
-            await asyncio.to_thread(
-                memory.store_message,
-                asst_emb,
-                assistant_text,
-                "assistant",
-                model_name,
-            )
+    entries = []
+    if user_text and len(user_text) >= config.min_query_chars:
+        entries.append((user_text, "user"))
+    if assistant_text and len(assistant_text) > 20 and not _is_unhelpful(assistant_text):
+        entries.append((assistant_text, "assistant"))
+    if not entries:
+        return
 
-        # Auto-save to disk after each conversation (prevents data loss on crash)
-        await asyncio.to_thread(memory.save)
+    try:
+        if store_batcher is not None:
+            await store_batcher.submit((entries, model_name))
+        else:
+            async with store_semaphore:
+                await _run_in(store_pool, _embed_and_store, entries, model_name)
+        # Written through to the OS already; the save task fsyncs it soon
+        memory_dirty.set()
 
         logger.debug(
-            f"Stored+saved: user={len(user_text or '')}ch, "
+            f"Stored: user={len(user_text or '')}ch, "
             f"assistant={len(assistant_text or '')}ch, "
             f"total={memory.count} contexts"
         )
@@ -292,10 +468,84 @@ async def _store_conversation(
         logger.error(f"Failed to store conversation: {e}")
 
 
+def _embed_and_store(entries: list, model_name: str):
+    """Embed (text, role) entries in one batched forward pass and store them.
+
+    The reply is stored first so the question can link to it for the
+    response cache.
+    """
+    embeddings = embedder.embed_batch([text for text, _ in entries])
+    _store_entries(entries, embeddings, model_name)
+
+
+def _embed_and_store_batch(batch: list) -> list:
+    """Store several conversations with one embedding pass over all their texts."""
+    embeddings = iter(
+        embedder.embed_batch([text for entries, _ in batch for text, _ in entries])
+    )
+    for entries, model_name in batch:
+        _store_entries(entries, [next(embeddings) for _ in entries], model_name)
+    return [None] * len(batch)
+
+
+def _store_entries(entries: list, embeddings, model_name: str):
+    extra = None
+    for (text, role), emb in reversed(list(zip(entries, embeddings))):
+        ctx_id = memory.store_message(
+            emb, text, role, model_name, extra, normalized=True
+        )
+        if role == "assistant":
+            extra = {"reply_id": ctx_id}
+
+
+async def _periodic_save():
+    """Fsync newly stored memories, at most once per save_interval_s."""
+    while True:
+        await memory_dirty.wait()
+        memory_dirty.clear()
+        try:
+            await _run_in(io_pool, memory.save)
+        except Exception as e:
+            logger.error(f"Failed to save memory: {e}")
+        await asyncio.sleep(config.save_interval_s)
+
+
+# ==================================================================
+# Hot read-only endpoints (model lists, health checks) that clients poll
+# constantly: forwarded without the catch-all's header and body handling
+# ==================================================================
+
+@app.get("/api/tags")
+@app.get("/api/ps")
+@app.get("/api/version")
+async def ollama_info(request: Request):
+    async with http_client.get(request.url.path) as response:
+        content = await response.read()
+    return Response(
+        content=content,
+        status_code=response.status,
+        media_type=response.headers.get("content-type", "application/json"),
+    )
+
+
 # ==================================================================
 # Catch-all: proxy everything else to Ollama unchanged
 # ==================================================================
 
+# Connection-level headers that must not be forwarded (RFC 9110 7.6.1)
+_HOP_BY_HOP_HEADERS = frozenset((
+    b"host",
+    b"connection",
+    b"keep-alive",
+    b"transfer-encoding",
+    b"te",
+    b"trailer",
+    b"upgrade",
+    b"proxy-authorization",
+    b"proxy-authenticate",
+))
+
+
 @app.api_route(
     "/{path:path}",
     methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"],
@@ -303,37 +553,40 @@ async def _store_conversation(
 async def proxy_passthrough(request: Request, path: str):
     """Forward any non-chat request to Ollama as-is."""
     url = f"/{path}"
-    headers = {
-        k: v
-        for k, v in request.headers.items()
-        if k.lower() not in ("host", "transfer-encoding")
-    }
+    # Raw header names are already lowercase bytes
+    headers = [
+        (k.decode("latin-1"), v.decode("latin-1"))
+        for k, v in request.headers.raw
+        if k not in _HOP_BY_HOP_HEADERS
+    ]
     body = await request.body()
 
     if request.method == "POST":
         return await _stream_passthrough(request.method, url, headers, body)
     else:
-        response = await http_client.request(
-            method=request.method,
-            url=url,
-            headers=headers,
-            content=body,
-        )
+        async with http_client.request(
+            request.method, url, headers=headers, data=body
+        ) as response:
+            content = await response.read()
         return Response(
-            content=response.content,
-            status_code=response.status_code,
+            content=content,
+            status_code=response.status,
             media_type=response.headers.get("content-type", "application/json"),
         )
 
 
-async def _stream_passthrough(method: str, url: str, headers: dict, body: bytes):
+async def _stream_passthrough(method: str, url: str, headers, body: bytes):
     """Stream a POST response from Ollama back to the client."""
 
     async def generate():
-        async with http_client.stream(
-            method, url, headers=headers, content=body
+        async with http_client.request(
+            method, url, headers=headers, data=body
         ) as response:
-            async for chunk in response.aiter_bytes():
+            # Forward whatever has arrived, as the buffers it arrived in
+            while True:
+                chunk = await response.content.readany()
+                if not chunk:
+                    break
                 yield chunk
 
     return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -343,6 +596,70 @@ async def _stream_passthrough(method: str, url: str, headers: dict, body: bytes)
 # Helpers
 # ==================================================================
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _encode_body(body: dict) -> bytes:
+    """Serialize a request body for Ollama.
+
+    Bodies recovered by the json fallback in chat/generate can hold lone
+    surrogates, which orjson refuses; json escapes them as \\uXXXX instead.
+    """
+    try:
+        return orjson.dumps(body)
+    except TypeError:
+        return json.dumps(body).encode("ascii")
+
+
+async def _iter_lines(response: aiohttp.ClientResponse):
+    """Yield the raw lines of a streamed response, newline included.
+
+    Split by hand rather than with StreamReader's line iterator, which
+    rejects lines over its buffer limit (a final /api/generate frame carries
+    the whole token context). Lines stay bytes and keep their newline, so
+    they are forwarded as-is; only the content value is ever decoded.
+    """
+    pending = b""
+    async for chunk in response.content.iter_any():
+        buf = pending + chunk if pending else chunk
+        start = 0
+        end = buf.find(b"\n")
+        while end >= 0:
+            yield buf[start : end + 1]
+            start = end + 1
+            end = buf.find(b"\n", start)
+        pending = buf[start:]
+    if pending:
+        yield pending
+
+
+# Ollama's NDJSON chunks have a fixed schema, so the streamed text can be
+# sliced out of each line instead of parsing the whole chunk. The first match
+# is the one we want: message.content / response precede any nested objects.
+# Frames without the key at all (e.g. metadata-only ones) are skipped by a
+# plain substring test before the regex runs.
+_CHAT_CONTENT_KEY = b'"content":'
+_CHAT_CONTENT_RE = re.compile(rb'"content":\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+_GENERATE_CONTENT_KEY = b'"response":'
+_GENERATE_CONTENT_RE = re.compile(rb'"response":\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+
+
+def _scan_content(key: bytes, pattern: re.Pattern, line: bytes) -> bytes:
+    """Return the string value matched by pattern in an NDJSON line, as UTF-8."""
+    if key not in line:
+        return b""
+    m = pattern.search(line)
+    if m is None:
+        return b""
+    raw = m.group(1)
+    if b"\\" not in raw:
+        return raw
+    try:
+        return orjson.loads(b'"' + raw + b'"').encode("utf-8")
+    except orjson.JSONDecodeError:
+        return b""
+
+
 _UNHELPFUL_PHRASES = [
     "i don't have access",
     "i don't have persistent memory",
@@ -356,25 +673,46 @@ _UNHELPFUL_PHRASES = [
     "nu am informatii",
 ]
 
+# Refusals open the reply, so only the head of long responses is scanned
+_UNHELPFUL_SCAN_CHARS = 2048
+
+
+def _build_unhelpful_automaton():
+    automaton = ahocorasick.Automaton()
+    for i, phrase in enumerate(_UNHELPFUL_PHRASES):
+        automaton.add_word(phrase, i)
+    automaton.make_automaton()
+    return automaton
+
+
+_UNHELPFUL_AC = _build_unhelpful_automaton() if ahocorasick is not None else None
+
 
 def _is_unhelpful(text: str) -> bool:
     """Check if an assistant response is a generic refusal that shouldn't be stored."""
-    lower = text.lower()
-    return any(phrase in lower for phrase in _UNHELPFUL_PHRASES)
+    head = text[:_UNHELPFUL_SCAN_CHARS].casefold()
+    if _UNHELPFUL_AC is not None:
+        return next(_UNHELPFUL_AC.iter(head), None) is not None
+    return any(phrase in head for phrase in _UNHELPFUL_PHRASES)
 
 
 def _extract_last_user_message(messages: list) -> Optional[str]:
     """Extract the text of the most recent user message."""
     for msg in reversed(messages):
-        if msg.get("role") == "user":
-            content = msg.get("content", "")
-            if isinstance(content, list):
-                # Multimodal: extract text parts
-                content = " ".join(
-                    part.get("text", "")
-                    for part in content
-                    if isinstance(part, dict) and "text" in part
-                )
-            if isinstance(content, str) and content.strip():
-                return content.strip()
+        if msg.get("role") != "user":
+            continue
+        content = msg.get("content")
+        if type(content) is not str:
+            if not isinstance(content, list):
+                continue
+            # Multimodal: extract text parts
+            content = " ".join(
+                part["text"]
+                for part in content
+                if isinstance(part, dict) and "text" in part
+            )
+        if content:
+            content = content.strip()
+            if content:
+                return content
     return None
@@ -16,13 +16,19 @@ def main():
     )
 
     config = ProxyConfig.from_env()
+    if config.workers > 1:
+        logging.getLogger(__name__).warning(
+            f"WORKERS={config.workers}: each worker process keeps its own memory "
+            f"store and they all append to {config.memory_storage_path}; "
+            "memories will diverge and the store can be corrupted"
+        )
 
     print("=" * 60)
     print("  Ollama Memory Proxy (TRANSPARENT MODE)")
     print("=" * 60)
     print(f"  Proxy:      http://{config.proxy_host}:{config.proxy_port}")
     print(f"  Ollama:     {config.ollama_base_url}")
-    print(f"  Embedder:   {config.embedding_model} ({config.embedding_device})")
+    print(f"  Embedder:   {config.embedding_model} ({config.embedding_device}, {config.embedding_backend})")
     print(f"  Memory:     {config.memory_storage_path}")
     print(f"  Threshold:  {config.similarity_threshold}")
     print(f"  Top-K:      {config.search_top_k}")
@@ -38,6 +44,11 @@ def main():
         "proxy:app",
         host=config.proxy_host,
         port=config.proxy_port,
+        # libuv event loop and C HTTP parser, both in requirements.txt
+        # (uvloop has no Windows build)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=config.workers,
         log_level="info",
     )
 
@@ -0,0 +1,130 @@
+import pickle
+
+import numpy as np
+import orjson
+import pytest
+
+from config import ProxyConfig
+from memory_manager import MemoryManager, StoreMismatchError
+
+
+def _manager(path, vector_dtype: str = "float32", dim: int = 8) -> MemoryManager:
+    config = ProxyConfig(
+        memory_storage_path=str(path),
+        embedding_dim=dim,
+        vector_dtype=vector_dtype,
+        index_type="flat",
+    )
+    return MemoryManager(config)
+
+
+def _unit(i: int) -> np.ndarray:
+    vec = np.zeros(8, dtype=np.float32)
+    vec[i] = 1.0
+    return vec
+
+
+def _random_units(n: int, dim: int = 8) -> np.ndarray:
+    vecs = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def _store_files(path) -> dict:
+    return {f.name: f.read_bytes() for f in path.iterdir()}
+
+
+def test_switching_vector_dtype_back_keeps_rows_stored_in_between(tmp_path):
+    memory = _manager(tmp_path, "float32")
+    memory.store_message(_unit(0), "stored as float32", "user")
+    memory.save()
+
+    memory = _manager(tmp_path, "int8")
+    memory.store_message(_unit(1), "stored as int8", "user")
+    memory.save()
+
+    memory = _manager(tmp_path, "float32")
+    assert memory.count == 2
+    for i, text in enumerate(["stored as float32", "stored as int8"]):
+        results = memory.search_relevant(_unit(i), top_k=1, similarity_threshold=0.5)
+        assert [r["metadata"]["text"] for r in results] == [text]
+
+
+@pytest.mark.parametrize("vector_dtype", ["float32", "int8"])
+@pytest.mark.parametrize("without_info", [False, True])
+def test_changed_embedding_dim_is_refused_and_store_kept(
+    tmp_path, vector_dtype, without_info
+):
+    vecs = _random_units(3)
+    memory = _manager(tmp_path, vector_dtype)
+    for i, vec in enumerate(vecs):
+        memory.store_message(vec, f"memory {i}", "user")
+    memory.save()
+    if without_info:
+        # Saved before the store recorded its layout
+        (tmp_path / "store.json").unlink()
+    before = _store_files(tmp_path)
+
+    for dim in (4, 16):
+        with pytest.raises(StoreMismatchError):
+            _manager(tmp_path, vector_dtype, dim=dim)
+        assert _store_files(tmp_path) == before
+
+    memory = _manager(tmp_path, vector_dtype)
+    assert memory.count == 3
+    results = memory.search_relevant(vecs[2], top_k=1, similarity_threshold=0.5)
+    assert [r["metadata"]["text"] for r in results] == ["memory 2"]
+    assert orjson.loads((tmp_path / "store.json").read_bytes())["dim"] == 8
+
+
+def test_record_torn_by_a_crash_is_dropped(tmp_path):
+    memory = _manager(tmp_path)
+    for i in range(3):
+        memory.store_message(_unit(i), f"memory {i}", "user", extra_metadata={"n": i})
+    memory.save()
+    # The last blob lost its tail, and a half-written record follows it
+    with open(tmp_path / "texts.bin", "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+    with open(tmp_path / "meta.rec", "ab") as f:
+        f.write(b"\x01" * 20)
+
+    memory = _manager(tmp_path)
+    assert memory.count == 2
+    memory.store_message(_unit(3), "memory 3", "user")
+    memory.save()
+
+    memory = _manager(tmp_path)
+    assert memory.count == 3
+    for i in (0, 1, 3):
+        results = memory.search_relevant(_unit(i), top_k=1, similarity_threshold=0.5)
+        assert [r["metadata"]["text"] for r in results] == [f"memory {i}"]
+    assert results[0]["ctx_id"] == 2
+
+
+def test_legacy_pickle_store_is_migrated(tmp_path):
+    vecs = _random_units(2)
+    np.save(tmp_path / "vectors.npy", vecs)
+    with open(tmp_path / "metadata.pkl", "wb") as f:
+        pickle.dump({
+            "id_map": [7, 9],
+            "metadata": {
+                7: {"text": "legacy user", "role": "user", "timestamp": 1.0},
+                9: {"text": "legacy reply", "role": "assistant", "timestamp": 2.0},
+            },
+        }, f)
+
+    memory = _manager(tmp_path)
+    assert memory.count == 2
+    results = memory.search_relevant(vecs[1], top_k=1, similarity_threshold=0.5)
+    assert results[0]["ctx_id"] == 9
+    assert results[0]["metadata"]["text"] == "legacy reply"
+    assert memory.store_message(vecs[0], "new", "user") == 10
+
+
+def test_legacy_store_of_another_dim_is_refused(tmp_path):
+    np.save(tmp_path / "vectors.npy", _random_units(2, dim=16))
+    with open(tmp_path / "metadata.pkl", "wb") as f:
+        pickle.dump({"id_map": [0, 1], "metadata": {}}, f)
+
+    with pytest.raises(StoreMismatchError):
+        _manager(tmp_path)
+    assert not (tmp_path / "meta.rec").exists()